@@ -0,0 +1,169 @@
+"""
+Adaptive (AIMD) concurrency controller for page fetching
+
+A fixed pool size is either too slow or too aggressive for the site. The
+controller keeps a concurrency limit between MIN_CONCURRENCY and
+MAX_CONCURRENCY and adjusts it from what every page fetch reports back:
+
+    - additive increase: after `limit` clean fetches in a row, +1 slot, as
+      long as the recent p95 latency stays within LATENCY_TOLERANCE of the
+      best p95 seen so far
+    - multiplicative decrease: on a 429/5xx, a timeout or a redirect to
+      /login the limit is halved (at most once per BACKOFF_COOLDOWN seconds,
+      so one burst of errors counts once)
+
+Independently of the limit, a token bucket keeps the start rate of new
+fetches under MAX_RPS (0 disables the cap).
+
+Usage:
+    limiter = AdaptiveLimiter()
+    async with limiter.slot() as fetch:
+        ...
+        fetch.report(status=response.status)   # or fetch.report(failure='timeout')
+"""
+
+import asyncio
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+
+MIN_CONCURRENCY = int(os.getenv('MIN_CONCURRENCY', '1'))
+MAX_CONCURRENCY = int(os.getenv('MAX_CONCURRENCY', '8'))
+MAX_RPS = float(os.getenv('MAX_RPS', '2'))
+LATENCY_TOLERANCE = float(os.getenv('LATENCY_TOLERANCE', '1.5'))
+BACKOFF_COOLDOWN = float(os.getenv('BACKOFF_COOLDOWN', '10'))
+LATENCY_WINDOW = 20
+
+# Failures that mean "slow down" rather than "this page is broken"
+BACKOFF_FAILURES = ('timeout', 'login')
+
+
+def is_backoff(status=None, failure=None):
+    """True for responses/failures the server uses to push back"""
+    if failure in BACKOFF_FAILURES:
+        return True
+    return status is not None and (status == 429 or status >= 500)
+
+
+def p95(values):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+
+class Fetch:
+    """Outcome of one fetch, filled in by the caller inside AdaptiveLimiter.slot()"""
+
+    def __init__(self):
+        self.status = None
+        self.failure = None
+
+    def report(self, status=None, failure=None):
+        if status is not None:
+            self.status = status
+        if failure is not None:
+            self.failure = failure
+
+
+class AdaptiveLimiter:
+    def __init__(self, initial=None, min_limit=MIN_CONCURRENCY, max_limit=MAX_CONCURRENCY, max_rps=MAX_RPS):
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.limit = max(self.min_limit, min(initial or self.min_limit, self.max_limit))
+        self.max_rps = max_rps
+        self.in_flight = 0
+        self.successes = 0
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.best_p95 = None
+        self.last_backoff = 0.0
+        self.next_start = 0.0
+        self.stats = {'ok': 0, 'backoff': 0, 'errors': 0, 'increases': 0, 'decreases': 0, 'peak': self.limit}
+        self.changed = asyncio.Condition()
+
+    async def acquire(self):
+        async with self.changed:
+            await self.changed.wait_for(lambda: self.in_flight < self.limit)
+            self.in_flight += 1
+        await self.throttle()
+
+    async def throttle(self):
+        """Space out fetch starts to at most max_rps per second"""
+        if self.max_rps <= 0:
+            return
+        now = time.monotonic()
+        start = max(now, self.next_start)
+        self.next_start = start + 1.0 / self.max_rps
+        if start > now:
+            await asyncio.sleep(start - now)
+
+    async def release(self, latency, status=None, failure=None):
+        async with self.changed:
+            self.in_flight -= 1
+            if is_backoff(status, failure):
+                self.stats['backoff'] += 1
+                self.on_backoff()
+            elif failure:
+                # Page-specific error: neither a reason to grow nor to shrink
+                self.stats['errors'] += 1
+                self.successes = 0
+            else:
+                self.stats['ok'] += 1
+                self.on_success(latency)
+            self.changed.notify_all()
+
+    def on_success(self, latency):
+        self.latencies.append(latency)
+        current = p95(self.latencies)
+        if len(self.latencies) >= min(LATENCY_WINDOW, 5):
+            self.best_p95 = current if self.best_p95 is None else min(self.best_p95, current)
+
+        self.successes += 1
+        if self.successes < self.limit or self.limit >= self.max_limit:
+            return
+        self.successes = 0
+        if self.best_p95 is not None and current > self.best_p95 * LATENCY_TOLERANCE:
+            # Latency is climbing: hold the current level
+            return
+        self.limit += 1
+        self.stats['increases'] += 1
+        self.stats['peak'] = max(self.stats['peak'], self.limit)
+
+    def on_backoff(self):
+        self.successes = 0
+        now = time.monotonic()
+        if now - self.last_backoff < BACKOFF_COOLDOWN:
+            return
+        self.last_backoff = now
+        new_limit = max(self.min_limit, self.limit // 2)
+        if new_limit < self.limit:
+            self.limit = new_limit
+            self.stats['decreases'] += 1
+        # Forget latencies measured at the old level
+        self.latencies.clear()
+
+    @asynccontextmanager
+    async def slot(self):
+        """Hold one concurrency slot for a fetch and feed its outcome back"""
+        await self.acquire()
+        fetch = Fetch()
+        started = time.monotonic()
+        try:
+            yield fetch
+        except asyncio.TimeoutError:
+            fetch.report(failure='timeout')
+            raise
+        except Exception:
+            fetch.report(failure=fetch.failure or 'error')
+            raise
+        finally:
+            await self.release(time.monotonic() - started, fetch.status, fetch.failure)
+
+    def print_summary(self):
+        print(f"🎛️  Concurrency: settled at {self.limit} (peak {self.stats['peak']}, "
+              f"range {self.min_limit}-{self.max_limit}, "
+              f"{f'{self.max_rps:g} req/s cap' if self.max_rps else 'no req/s cap'})")
+        print(f"   {self.stats['ok']} ok, {self.stats['backoff']} backoff signals, {self.stats['errors']} errors, "
+              f"{self.stats['increases']} increases, {self.stats['decreases']} decreases, "
+              f"p95 {p95(self.latencies):.1f}s")
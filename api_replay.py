@@ -0,0 +1,140 @@
+"""
+HTTP fast path: replay the authenticated search API without the browser
+
+Once one results page has been loaded in the browser, network_capture.py
+knows the exact request the SPA sent to the search API (URL, method, headers
+including any bearer token, JSON body). SearchApiReplay re-sends that request
+for other page numbers through Playwright's APIRequestContext - a pooled,
+keep-alive HTTP client that carries the session cookies from the browser
+context's storage_state - and parses the JSON into the usual records. No
+navigation, rendering or DOM walking per page.
+
+Pagination parameters are rewritten in the query string and in the JSON body.
+The page index of the captured request is compared with the UI page number it
+was captured for, so 0-based APIs work too.
+
+Usage:
+    replay = SearchApiReplay(capture.request_template, captured_page=1, page_size=100)
+    await replay.start(playwright, await context.storage_state())
+    status, payload = await replay.fetch(2)
+    await replay.close()
+"""
+
+import json
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode, quote
+
+PAGE_KEYS = ('page', 'pageNumber', 'page_number', 'pageIndex', 'page_index')
+SIZE_KEYS = ('size', 'pageSize', 'page_size', 'per_page', 'perPage', 'limit')
+OFFSET_KEYS = ('offset', 'from', 'skip', 'start')
+
+# Headers the HTTP client sets itself (cookies come from storage_state)
+DROP_HEADERS = {'cookie', 'content-length', 'host', 'connection', 'accept-encoding'}
+
+
+def _page_base(value, captured_page):
+    """Difference between the API's page index and the UI page number"""
+    try:
+        return int(value) - captured_page
+    except (TypeError, ValueError):
+        return None
+
+
+def _repage_pairs(pairs, page_number, page_size, captured_page):
+    """Rewrite pagination in (key, value) pairs; returns (pairs, found_page_key)"""
+    out, found = [], False
+    for key, value in pairs:
+        if key in PAGE_KEYS and _page_base(value, captured_page) is not None:
+            value, found = str(page_number + _page_base(value, captured_page)), True
+        elif key in SIZE_KEYS:
+            value = str(page_size)
+        elif key in OFFSET_KEYS and str(value).isdigit():
+            value, found = str((page_number - 1) * page_size), True
+        out.append((key, value))
+    return out, found
+
+
+def _repage_body(body, page_number, page_size, captured_page):
+    """Rewrite pagination keys anywhere in a JSON body; returns found_page_key"""
+    found = False
+    if isinstance(body, dict):
+        for key, value in body.items():
+            if isinstance(value, (dict, list)):
+                found = _repage_body(value, page_number, page_size, captured_page) or found
+            elif key in PAGE_KEYS and isinstance(value, int):
+                body[key], found = page_number + value - captured_page, True
+            elif key in SIZE_KEYS and isinstance(value, int):
+                body[key] = page_size
+            elif key in OFFSET_KEYS and isinstance(value, int):
+                body[key], found = (page_number - 1) * page_size, True
+    elif isinstance(body, list):
+        for value in body:
+            found = _repage_body(value, page_number, page_size, captured_page) or found
+    return found
+
+
+def build_request(template, page_number, page_size, captured_page):
+    """
+    Return (url, body) of the template request for another page, or None
+    if the template has no recognisable pagination parameter.
+    """
+    parts = urlsplit(template['url'])
+    pairs, found = _repage_pairs(parse_qsl(parts.query, keep_blank_values=True), page_number, page_size, captured_page)
+    url = urlunsplit(parts._replace(query=urlencode(pairs, safe='[]', quote_via=quote)))
+
+    body = template.get('postData')
+    if body:
+        try:
+            data = json.loads(body)
+        except ValueError:
+            data = None
+        if data is not None:
+            found = _repage_body(data, page_number, page_size, captured_page) or found
+            body = json.dumps(data)
+
+    return (url, body) if found else None
+
+
+class SearchApiReplay:
+    def __init__(self, template, captured_page, page_size):
+        self.template = template
+        self.captured_page = captured_page
+        self.page_size = page_size
+        self.headers = {
+            k: v for k, v in template['headers'].items()
+            if k.lower() not in DROP_HEADERS and not k.startswith(':')
+        }
+        self.request = None
+        self.requests = 0
+
+    def can_paginate(self):
+        return build_request(self.template, self.captured_page + 1, self.page_size, self.captured_page) is not None
+
+    async def start(self, playwright, storage_state):
+        """Open the pooled HTTP client with the browser session's cookies"""
+        self.request = await playwright.request.new_context(
+            storage_state=storage_state,
+            extra_http_headers=self.headers,
+        )
+
+    async def fetch(self, page_number, timeout=30000):
+        """Fetch one results page; returns (status, payload or None)"""
+        url, body = build_request(self.template, page_number, self.page_size, self.captured_page)
+        response = await self.request.fetch(
+            url,
+            method=self.template['method'],
+            data=body,
+            max_redirects=0,
+            timeout=timeout,
+        )
+        self.requests += 1
+        if not response.ok:
+            return response.status, None
+        try:
+            return response.status, await response.json()
+        except Exception:
+            # An HTML login page instead of JSON means the session is gone
+            return 401, None
+
+    async def close(self):
+        if self.request:
+            await self.request.dispose()
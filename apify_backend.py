@@ -0,0 +1,440 @@
+"""
+Shared result handling for the Apify-backed scrapers
+
+muraena_scraper.py, muraena_scraper_cookies.py and
+muraena_scraper_with_your_cookies.py all run apify/playwright-scraper and
+then pull the run's dataset. Dataset items are streamed straight into an
+NDJSON sink instead of being collected with list(iterate_items()), and the
+legacy muraena_results.json array is exported from that file afterwards.
+
+run_actor() starts the actor without blocking and waits for it with the API's
+long-poll waitForFinish instead of sleeping between status requests, so the
+finish is noticed as soon as it happens. Between waits, dataset items that
+the run has already pushed are streamed into the sink - results show up
+while the run is still going - and the run log is tailed live (apify_log.py).
+Only a SUCCEEDED run replaces muraena_results.json; what a failed, aborted
+or timed-out run pushed goes to muraena_results.partial.json instead.
+Finished runs are recorded in the local telemetry store (run_stats.py).
+
+DatasetFetcher downloads those items in offset windows of DATASET_WINDOW
+items, DATASET_WORKERS windows at a time over the client's pooled keep-alive
+HTTP session, and yields them in dataset order. DATASET_FIELDS /
+DATASET_OMIT project the items on the server, and DATASET_CLEAN (off by
+default: it would also drop the items of failed requests) skips empty items
+and hidden '#debug'/'#error' fields.
+
+download_artifacts() lists a run's key-value store, picks the keys matching
+APIFY_ARTIFACTS (screenshots by default) and downloads them on a bounded
+thread pool, skipping files that already exist locally with the same size.
+
+run_fanout() splits a page range into shards and starts one actor run per
+shard, each with one start request per results page (or, for the login
+scraper, one login that then visits the shard's pages), follows all runs at once
+and merges their datasets into one sink, dropping records whose company URL
+was already seen. A large search takes as long as its slowest shard.
+"""
+
+import fnmatch
+import os
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from result_sink import NdjsonSink, export_json
+from pagination import build_page_url, shard_pages
+from apify_log import LogTailer
+from run_stats import record_run
+
+RESULTS_FILE = 'muraena_results.json'
+RESULTS_NDJSON = 'muraena_results.ndjson'
+RESULTS_PARTIAL = 'muraena_results.partial.json'
+
+ACTOR_ID = 'apify/playwright-scraper'
+TERMINAL_STATUSES = ('SUCCEEDED', 'FAILED', 'ABORTED', 'TIMED-OUT')
+# Longest a single long-poll wait lasts before new dataset items are pulled
+STREAM_INTERVAL = int(os.getenv('APIFY_STREAM_INTERVAL', '5'))
+DATASET_WINDOW = int(os.getenv('APIFY_DATASET_WINDOW', '1000'))
+DATASET_WORKERS = int(os.getenv('APIFY_DATASET_WORKERS', '4'))
+DATASET_FIELDS = os.getenv('APIFY_DATASET_FIELDS', '')
+DATASET_OMIT = os.getenv('APIFY_DATASET_OMIT', '')
+DATASET_CLEAN = os.getenv('APIFY_DATASET_CLEAN', 'false').lower() == 'true'
+ARTIFACT_PATTERNS = os.getenv('APIFY_ARTIFACTS', '*.jpg,*.jpeg,*.png')
+ARTIFACT_WORKERS = int(os.getenv('APIFY_ARTIFACT_WORKERS', '8'))
+SHARDS = int(os.getenv('APIFY_SHARDS', '4'))
+SHARD_CONCURRENCY = int(os.getenv('APIFY_SHARD_CONCURRENCY', '2'))
+
+
+def _text(value):
+    """Record fields are plain strings or {text, link} dicts depending on the pageFunction"""
+    return value.get('text', 'N/A') if isinstance(value, dict) else value
+
+
+def print_item_summary(idx, item):
+    print(f"\n📋 Item {idx + 1}:")
+    print(f"   Total records: {item.get('totalRecords', 0)}")
+    print(f"   Page URL: {item.get('pageUrl', 'N/A')}")
+    print(f"   Scraped at: {item.get('scrapedAt', 'N/A')}")
+
+    if item['results']:
+        print("\n   Sample records:")
+        for i, record in enumerate(item['results'][:3]):
+            print(f"   {i+1}. {_text(record.get('companyName', 'N/A'))}")
+            print(f"      Industry: {_text(record.get('industry', 'N/A'))}")
+            print(f"      Location: {_text(record.get('location', 'N/A'))}")
+            print(f"      Email: {_text(record.get('email', 'N/A'))}")
+            print(f"      Phone: {_text(record.get('phone', 'N/A'))}")
+
+
+class DatasetWriter:
+    """Streams dataset items to NDJSON, printing the first few summaries"""
+
+    def __init__(self, ndjson_file=RESULTS_NDJSON, summaries=3):
+        self.ndjson_file = ndjson_file
+        self.summaries = summaries
+        self.item_count = 0
+        self.record_count = 0
+        self.sink = NdjsonSink(ndjson_file, append=False)
+
+    def write(self, item):
+        self.sink.write(item)
+        if 'results' in item:
+            self.record_count += len(item['results'])
+            if self.item_count < self.summaries:
+                print_item_summary(self.item_count, item)
+        self.item_count += 1
+
+    def finish(self, output_file=RESULTS_FILE, succeeded=True, partial_file=RESULTS_PARTIAL):
+        """
+        Close the stream and export the legacy JSON array; returns (item_count, record_count).
+        Unless succeeded, the items go to partial_file so output_file keeps the last complete run.
+        """
+        self.sink.close()
+        if self.item_count:
+            if succeeded:
+                export_json(self.ndjson_file, output_file)
+                print(f"\n📊 RESULTS: Found {self.item_count} item(s)")
+                print(f"💾 Results saved to: {output_file} (stream: {self.ndjson_file})")
+            else:
+                export_json(self.ndjson_file, partial_file)
+                print(f"\n⚠️ PARTIAL RESULTS: {self.item_count} item(s) from a run that did not succeed")
+                print(f"💾 Saved to: {partial_file} ({output_file} was left untouched)")
+        return self.item_count, self.record_count
+
+
+def save_dataset_items(items, output_file=RESULTS_FILE, ndjson_file=RESULTS_NDJSON, summaries=3):
+    """
+    Stream dataset items to NDJSON and export the legacy JSON array.
+
+    items is any iterable (e.g. DatasetFetcher(dataset_client).new_items()); only the
+    first `summaries` items are printed. Returns (item_count, record_count).
+    """
+    writer = DatasetWriter(ndjson_file, summaries)
+    for item in items:
+        writer.write(item)
+    return writer.finish(output_file)
+
+
+def _split(value):
+    return [v.strip() for v in value.split(',') if v.strip()] or None
+
+
+class DatasetFetcher:
+    """
+    Downloads a dataset in concurrent offset windows, resuming where the last
+    call stopped. Offsets count raw items, so 'clean' windows may hold fewer.
+    """
+
+    def __init__(self, dataset_client, window=DATASET_WINDOW, workers=DATASET_WORKERS,
+                 fields=DATASET_FIELDS, omit=DATASET_OMIT, clean=DATASET_CLEAN):
+        self.dataset_client = dataset_client
+        self.window = max(1, window)
+        self.workers = max(1, workers)
+        self.fields = _split(fields)
+        self.omit = _split(omit)
+        self.clean = clean
+        self.offset = 0
+        self.total = 0
+
+    def fetch_window(self, offset, limit):
+        return self.dataset_client.list_items(
+            offset=offset, limit=limit, clean=self.clean, fields=self.fields, omit=self.omit,
+        )
+
+    def windows(self, total):
+        """Fetch [offset, total) with a bounded number of windows in flight, in order"""
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            pending = deque()
+            for offset in range(self.offset, total, self.window):
+                pending.append(pool.submit(self.fetch_window, offset, min(self.window, total - offset)))
+                if len(pending) >= self.workers * 2:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+    def new_items(self):
+        """Yield the items added since the last call"""
+        while True:
+            # itemCount lags slightly behind pushes; list responses report the real total
+            info = self.dataset_client.get() or {}
+            total = max(self.total, info.get('itemCount') or 0)
+            if total > self.offset:
+                for page in self.windows(total):
+                    self.total = max(self.total, page.total or 0)
+                    yield from page.items
+                self.offset = total
+
+            # Don't trust itemCount to be done: read on from offset until a window
+            # comes back short. Cleaned windows can hold fewer items than they
+            # consumed, so the raw count comes from the response's total.
+            page = self.fetch_window(self.offset, self.window)
+            self.total = max(self.total, page.total or 0)
+            consumed = max(len(page.items), min(self.window, self.total - self.offset))
+            if consumed <= 0:
+                return
+            yield from page.items
+            self.offset += consumed
+            if consumed < self.window:
+                return
+
+
+def stream_new_items(fetcher, writer):
+    """Write the dataset items pushed since the last call; returns (items, records)"""
+    items = records = 0
+    for item in fetcher.new_items():
+        records += len(item.get('results') or [])
+        writer.write(item)
+        items += 1
+    return items, records
+
+
+def follow_run(client, run, writer, run_input, label='', group_id=None):
+    """
+    Wait for a started run with long polling, streaming its items into writer,
+    and record its stats when it ends
+    """
+    run_client = client.run(run['id'])
+    fetcher = DatasetFetcher(client.dataset(run['defaultDatasetId']))
+    tailer = LogTailer(client, run['id'], label)
+    tailer.start()
+    status = None
+    items = records = 0
+
+    try:
+        while True:
+            # Returns as soon as the run finishes, or after STREAM_INTERVAL seconds
+            run = run_client.wait_for_finish(wait_secs=STREAM_INTERVAL) or run
+            if run['status'] != status:
+                status = run['status']
+                print(f"📊 {label}Status: {status}")
+
+            new_items, new_records = stream_new_items(fetcher, writer)
+            items += new_items
+            records += new_records
+            if new_items:
+                print(f"📥 {label}{new_items} new item(s), {writer.record_count} records so far")
+
+            if status in TERMINAL_STATUSES:
+                break
+    finally:
+        tailer.stop()
+
+    record_run(client, run, run_input, items, records, group_id=group_id)
+    return run
+
+
+def run_actor(client, run_input, actor_id=ACTOR_ID, output_file=RESULTS_FILE, ndjson_file=RESULTS_NDJSON):
+    """
+    Start an actor run, wait for it with long polling and stream its dataset.
+
+    Returns (run, item_count, record_count); run['status'] is the final status.
+    """
+    run = client.actor(actor_id).start(run_input=run_input)
+
+    print(f"✅ Actor run started: {run['id']}")
+    print(f"🔗 View run: https://console.apify.com/actors/runs/{run['id']}")
+    print("⏳ Waiting for scraper to complete (results are streamed as they arrive)...")
+
+    writer = DatasetWriter(ndjson_file)
+    succeeded = False
+    try:
+        run = follow_run(client, run, writer, run_input)
+        succeeded = run['status'] == 'SUCCEEDED'
+    finally:
+        item_count, record_count = writer.finish(output_file, succeeded)
+
+    return run, item_count, record_count
+
+
+def company_key(record):
+    """Dedup key of a record: company URL, else website, else company name"""
+    if record.get('companyUrl'):
+        return record['companyUrl']
+    name = record.get('companyName')
+    if isinstance(name, dict):
+        return name.get('link') or name.get('text')
+    website = record.get('website')
+    if isinstance(website, dict):
+        website = website.get('link') or website.get('text')
+    return website or name
+
+
+class MergeWriter(DatasetWriter):
+    """DatasetWriter shared by several runs: thread safe, drops companies already written"""
+
+    def __init__(self, ndjson_file=RESULTS_NDJSON, summaries=3):
+        super().__init__(ndjson_file, summaries)
+        self.lock = threading.Lock()
+        self.seen = set()
+        self.duplicates = 0
+
+    def write(self, item):
+        with self.lock:
+            if 'results' in item:
+                fresh = []
+                for record in item['results']:
+                    key = company_key(record)
+                    if key and key in self.seen:
+                        self.duplicates += 1
+                        continue
+                    if key:
+                        self.seen.add(key)
+                    fresh.append(record)
+                item = dict(item, results=fresh, totalRecords=len(fresh))
+            super().write(item)
+
+
+def shard_input(run_input, page_urls, concurrency=SHARD_CONCURRENCY):
+    """run_input of one shard: one start request per results page"""
+    shard = dict(run_input)
+    first = run_input['startUrls'][0]
+    if first.get('userData', {}).get('label') == 'LOGIN':
+        # Log in once; the LOGIN request then scrapes the pages one by one in the
+        # logged-in page, so its pageFunction needs time for all of them
+        shard['startUrls'] = [{'url': first['url'], 'userData': {'label': 'LOGIN', 'targetUrls': page_urls}}]
+        shard['pageFunctionTimeoutSecs'] = max(run_input.get('pageFunctionTimeoutSecs', 60), 60 + 45 * len(page_urls))
+    else:
+        shard['startUrls'] = [{'url': url} for url in page_urls]
+    shard['maxConcurrency'] = concurrency
+    shard['maxRequestsPerCrawl'] = max(run_input.get('maxRequestsPerCrawl', 0), 2 * len(page_urls))
+    return shard
+
+
+def run_fanout(client, run_input, target_url, pages, page_size, shards=SHARDS, concurrency=SHARD_CONCURRENCY,
+               actor_id=ACTOR_ID, output_file=RESULTS_FILE, ndjson_file=RESULTS_NDJSON):
+    """
+    Scrape the given page numbers with one actor run per shard, merged into
+    one output. Returns (run, item_count, record_count) like run_actor(), where
+    run is the first run that did not succeed (or the last one).
+    """
+    page_urls = [build_page_url(target_url, page, page_size) for page in pages]
+    shard_urls = shard_pages(page_urls, shards)
+    runs = []
+    inputs = [shard_input(run_input, urls, concurrency) for urls in shard_urls]
+
+    try:
+        for i, urls in enumerate(shard_urls):
+            run = client.actor(actor_id).start(run_input=inputs[i])
+            runs.append(run)
+            print(f"✅ [shard {i + 1}/{len(shard_urls)}] {len(urls)} pages, run started: {run['id']}")
+            print(f"🔗 View run: https://console.apify.com/actors/runs/{run['id']}")
+    except Exception:
+        # Don't leave the shards that did start running (and billing) on their own
+        for run in runs:
+            client.run(run['id']).abort()
+        raise
+
+    print(f"⏳ Waiting for {len(runs)} runs (results are streamed as they arrive)...")
+    writer = MergeWriter(ndjson_file)
+    failed = None
+    try:
+        with ThreadPoolExecutor(max_workers=len(runs)) as pool:
+            finished = list(pool.map(
+                lambda args: follow_run(client, args[1], writer, inputs[args[0]],
+                                        f'[shard {args[0] + 1}] ', group_id=runs[0]['id']),
+                enumerate(runs),
+            ))
+        failed = [run for run in finished if run['status'] != 'SUCCEEDED']
+    finally:
+        # A merge missing a shard is not a complete result
+        item_count, record_count = writer.finish(output_file, failed == [])
+
+    print(f"🧩 Merged {len(finished)} runs, {writer.duplicates} duplicate companies dropped")
+    return (failed[0] if failed else finished[-1]), item_count, record_count
+
+
+def add_fanout_arguments(parser):
+    """Add the fan-out options (--pages, --start-page, --shards, ...) to an Apify script's parser"""
+    group = parser.add_argument_group('fan-out', 'Scrape a page range with several actor runs in parallel')
+    group.add_argument('--pages', type=int,
+                       help='Number of results pages to scrape (default: only TARGET_URL, one run)')
+    group.add_argument('--start-page', type=int, default=1, help='First page (default: 1)')
+    group.add_argument('--shards', type=int, default=SHARDS,
+                       help=f'Actor runs to split the pages over (default: {SHARDS})')
+    group.add_argument('--shard-concurrency', type=int, default=SHARD_CONCURRENCY,
+                       help=f'maxConcurrency of each run (default: {SHARD_CONCURRENCY})')
+    group.add_argument('--page-size', type=int, default=int(os.getenv('PAGE_SIZE', '100')),
+                       help='Results per page (default: PAGE_SIZE or 100)')
+
+
+def run_scraper_actor(client, run_input, target_url, args=None):
+    """run_fanout() if --pages was given, else a single run_actor()"""
+    if args is not None and args.pages:
+        pages = list(range(args.start_page, args.start_page + args.pages))
+        return run_fanout(client, run_input, target_url, pages, args.page_size,
+                          shards=args.shards, concurrency=args.shard_concurrency)
+    return run_actor(client, run_input)
+
+
+def list_keys(kv_store):
+    """Yield {'key', 'size'} entries of a key-value store, page by page"""
+    start_key = None
+    while True:
+        page = kv_store.list_keys(exclusive_start_key=start_key, limit=1000)
+        yield from page['items']
+        if not page.get('isTruncated'):
+            return
+        start_key = page['nextExclusiveStartKey']
+
+
+def download_artifacts(kv_store, patterns=ARTIFACT_PATTERNS, directory='screenshots', workers=ARTIFACT_WORKERS):
+    """
+    Download the records whose keys match any of the comma-separated glob
+    patterns into directory. Returns (downloaded, skipped, failed).
+    """
+    patterns = _split(patterns) or ['*']
+    wanted = [
+        entry for entry in list_keys(kv_store)
+        if any(fnmatch.fnmatchcase(entry['key'], pattern) for pattern in patterns)
+    ]
+    os.makedirs(directory, exist_ok=True)
+
+    todo = []
+    skipped = 0
+    for entry in wanted:
+        path = os.path.join(directory, entry['key'])
+        if os.path.exists(path) and os.path.getsize(path) == entry.get('size'):
+            skipped += 1
+        else:
+            todo.append((entry['key'], path))
+
+    def download(key, path):
+        try:
+            data = kv_store.get_record_as_bytes(key)
+            if not data or data.get('value') is None:
+                return False
+            # Temp file + rename so an interrupted download is never mistaken for a complete one
+            with open(f'{path}.tmp', 'wb') as f:
+                f.write(data['value'])
+            os.replace(f'{path}.tmp', path)
+            print(f"✅ Downloaded: {key}")
+            return True
+        except Exception as e:
+            print(f"⚠️ Could not download {key}: {str(e)}")
+            return False
+
+    downloaded = 0
+    if todo:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            downloaded = sum(pool.map(lambda args: download(*args), todo))
+
+    return downloaded, skipped, len(todo) - downloaded
@@ -0,0 +1,127 @@
+"""
+Live log tailing for Apify runs
+
+The Apify scripts used to download the whole run log only after a run had
+failed, so nothing was visible while it ran and a run stuck on the login
+page kept burning compute until it timed out. LogTailer follows the run's
+log stream in a background thread while the run executes:
+
+    - every line goes to a rolling local file (APIFY_LOG_FILE, rotated at
+      APIFY_LOG_MAX_MB with APIFY_LOG_BACKUPS old files kept)
+    - lines at or above APIFY_LOG_LEVEL (DEBUG, INFO, WARN, ERROR) are printed
+      as they arrive; continuation lines (stack traces) keep the level of the
+      line they belong to
+    - a line matching the APIFY_ABORT_ON regex aborts the run right away,
+      e.g. APIFY_ABORT_ON='Redirected to login|Not authenticated'
+    - the last lines are kept in memory for the failure summary
+
+Usage:
+    tailer = LogTailer(client, run['id'])
+    tailer.start()
+    ...                                  # wait for the run
+    tailer.stop()
+    print('\\n'.join(log_tail(client, run['id'], 50)))
+"""
+
+import logging
+import os
+import re
+import threading
+from collections import deque
+from logging.handlers import RotatingFileHandler
+
+LOG_LEVEL = os.getenv('APIFY_LOG_LEVEL', 'WARN').upper()
+LOG_FILE = os.getenv('APIFY_LOG_FILE', 'scraper_run.log')
+LOG_MAX_MB = float(os.getenv('APIFY_LOG_MAX_MB', '5'))
+LOG_BACKUPS = int(os.getenv('APIFY_LOG_BACKUPS', '3'))
+ABORT_ON = os.getenv('APIFY_ABORT_ON', '')
+
+LEVELS = {'DEBUG': 10, 'INFO': 20, 'WARN': 30, 'WARNING': 30, 'ERROR': 40, 'EXCEPTION': 40}
+LEVEL_PATTERN = re.compile(r'\b(DEBUG|INFO|WARNING|WARN|ERROR|EXCEPTION)\b')
+
+# Tailers of this process by run ID, so failure handling can print their tail
+tailers = {}
+_file_log = None
+_file_log_lock = threading.Lock()
+
+
+def file_log():
+    """Logger writing raw run log lines to the rolling LOG_FILE (shared by all tailers)"""
+    global _file_log
+    with _file_log_lock:
+        if _file_log is None:
+            handler = RotatingFileHandler(LOG_FILE, maxBytes=int(LOG_MAX_MB * 1024 * 1024),
+                                          backupCount=LOG_BACKUPS, encoding='utf-8')
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            _file_log = logging.getLogger('apify_run_log')
+            _file_log.setLevel(logging.INFO)
+            _file_log.propagate = False
+            _file_log.addHandler(handler)
+        return _file_log
+
+
+def line_level(line):
+    """Numeric level of an Apify log line, or None for continuation lines"""
+    match = LEVEL_PATTERN.search(line[:60])
+    return LEVELS[match.group(1)] if match else None
+
+
+class LogTailer(threading.Thread):
+    def __init__(self, client, run_id, label='', level=LOG_LEVEL, abort_on=ABORT_ON, tail_lines=100):
+        super().__init__(daemon=True)
+        self.client = client
+        self.run_id = run_id
+        self.label = label
+        self.level = LEVELS.get(level, LEVELS['WARN'])
+        self.abort_on = re.compile(abort_on) if abort_on else None
+        self.tail = deque(maxlen=tail_lines)
+        self.current_level = LEVELS['INFO']
+        self.errors = 0
+        self.aborted = False
+        tailers[run_id] = self
+
+    def run(self):
+        try:
+            with self.client.run(self.run_id).log().stream() as response:
+                if response is None:
+                    return
+                for line in response.iter_lines():
+                    if isinstance(line, bytes):
+                        line = line.decode('utf-8', errors='replace')
+                    self.handle(line.rstrip())
+        except Exception as e:
+            print(f"⚠️ {self.label}Log stream interrupted: {str(e)}")
+
+    def handle(self, line):
+        if not line:
+            return
+        self.tail.append(line)
+        file_log().info(f'{self.label}{line}')
+
+        level = line_level(line)
+        if level is not None:
+            self.current_level = level
+            if level >= LEVELS['ERROR']:
+                self.errors += 1
+        if self.current_level >= self.level:
+            print(f"📜 {self.label}{line}")
+
+        if self.abort_on and not self.aborted and self.abort_on.search(line):
+            self.aborted = True
+            print(f"🛑 {self.label}Log matched APIFY_ABORT_ON - aborting run {self.run_id}")
+            try:
+                self.client.run(self.run_id).abort()
+            except Exception as e:
+                print(f"⚠️ {self.label}Could not abort run: {str(e)}")
+
+    def stop(self, timeout=10):
+        """Wait for the stream to drain (it ends with the run)"""
+        self.join(timeout)
+
+
+def log_tail(client, run_id, lines=50):
+    """Last lines of a run's log: from its tailer, else downloaded in full"""
+    tailer = tailers.get(run_id)
+    if tailer and tailer.tail:
+        return list(tailer.tail)[-lines:]
+    return (client.log(run_id).get() or '').split('\n')[-lines:]
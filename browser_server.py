@@ -0,0 +1,92 @@
+"""
+Warm browser server for repeated scraper runs
+
+Every scraper run used to start Playwright, launch Chromium and tear it all
+down again, so cron-style repeated runs paid the browser cold start each time.
+This script keeps ONE Chromium running with a CDP endpoint; scrapers started
+with --connect attach to it and only open a fresh browser context, which takes
+milliseconds instead of seconds.
+
+Usage:
+    python browser_server.py                    # serve on port 9222
+    python browser_server.py --port 9333 --headless
+
+    python muraena_scraper_local.py --connect
+    python muraena_scraper_multipage.py --pages 5 --connect http://127.0.0.1:9333
+
+The endpoint is also written to .browser_endpoint, which --connect uses when no
+endpoint is given.
+"""
+
+import argparse
+import asyncio
+import os
+from playwright.async_api import async_playwright
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+BROWSER_PORT = int(os.getenv('BROWSER_PORT', '9222'))
+ENDPOINT_FILE = '.browser_endpoint'
+
+
+def default_endpoint():
+    """Endpoint from BROWSER_ENDPOINT, the running server's endpoint file, or the default port"""
+    if os.getenv('BROWSER_ENDPOINT'):
+        return os.getenv('BROWSER_ENDPOINT')
+    if os.path.exists(ENDPOINT_FILE):
+        with open(ENDPOINT_FILE, 'r', encoding='utf-8') as f:
+            return f.read().strip()
+    return f'http://127.0.0.1:{BROWSER_PORT}'
+
+
+async def launch_or_connect(playwright, endpoint=None, headless=False):
+    """Attach to a running browser server if endpoint is set, else launch a new Chromium"""
+    if endpoint:
+        print(f"🔌 Attaching to browser server at {endpoint}...")
+        return await playwright.chromium.connect_over_cdp(endpoint)
+
+    print("🌐 Launching browser...")
+    return await playwright.chromium.launch(
+        headless=headless,
+        args=['--no-sandbox']
+    )
+
+
+async def serve(port, headless):
+    async with async_playwright() as playwright:
+        browser = await playwright.chromium.launch(
+            headless=headless,
+            args=['--no-sandbox', f'--remote-debugging-port={port}']
+        )
+        endpoint = f'http://127.0.0.1:{port}'
+        with open(ENDPOINT_FILE, 'w', encoding='utf-8') as f:
+            f.write(endpoint)
+
+        print(f"✅ Browser server ready: {endpoint}")
+        print(f"   Endpoint written to {ENDPOINT_FILE}")
+        print("   Run the scrapers with --connect to attach. Press Ctrl+C to stop.\n")
+
+        try:
+            await asyncio.Event().wait()
+        finally:
+            if os.path.exists(ENDPOINT_FILE):
+                os.remove(ENDPOINT_FILE)
+            await browser.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Keep a Chromium instance warm for the scrapers')
+    parser.add_argument('--port', type=int, default=BROWSER_PORT, help=f'CDP port (default: {BROWSER_PORT})')
+    parser.add_argument('--headless', action='store_true', help='Run the browser without a window')
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(serve(args.port, args.headless))
+    except KeyboardInterrupt:
+        print("\n🧹 Browser server stopped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+On-disk checkpoint frontier for resumable multi-page crawls
+
+If a long run died on page 40, the only option used to be starting over.
+The multi-page crawler now records, per search query, which pages are done
+(with how many records they added and the NDJSON byte offset after their
+write) and which failed. `--resume` then:
+
+    - reuses the same NDJSON output file,
+    - truncates it to the last committed offset (drops a half-written page),
+    - skips the finished pages and retries only failed / missing ones.
+
+Checkpoints live in CHECKPOINT_DIR, one JSON file per (base URL, page size),
+and are rewritten atomically (temp file + os.replace) after every page.
+"""
+
+import hashlib
+import json
+import os
+from datetime import datetime
+
+CHECKPOINT_DIR = os.getenv('CHECKPOINT_DIR', 'checkpoints')
+
+
+def query_id(base_url, page_size):
+    """Stable id for a search query, ignoring the page parameter"""
+    return hashlib.sha1(f'{base_url}|{page_size}'.encode('utf-8')).hexdigest()[:12]
+
+
+class CrawlCheckpoint:
+    def __init__(self, path, data):
+        self.path = path
+        self.data = data
+
+    @classmethod
+    def open(cls, base_url, page_size, timestamp, ndjson_file, resume=False):
+        """Load the checkpoint for a query when resuming, else start a new one"""
+        os.makedirs(CHECKPOINT_DIR, exist_ok=True)
+        path = os.path.join(CHECKPOINT_DIR, f'{query_id(base_url, page_size)}.json')
+
+        if resume and os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                return cls(path, json.load(f))
+
+        checkpoint = cls(path, {
+            'baseUrl': base_url,
+            'pageSize': page_size,
+            'timestamp': timestamp,
+            'ndjsonFile': ndjson_file,
+            'createdAt': datetime.now().isoformat(timespec='seconds'),
+            'pages': {},
+        })
+        checkpoint.save()
+        return checkpoint
+
+    @property
+    def timestamp(self):
+        return self.data['timestamp']
+
+    @property
+    def ndjson_file(self):
+        return self.data['ndjsonFile']
+
+    @property
+    def committed_offset(self):
+        """NDJSON byte offset covered by finished pages"""
+        offsets = [p['offset'] for p in self.data['pages'].values() if p['status'] == 'done']
+        return max(offsets, default=0)
+
+    def save(self):
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.data, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def is_done(self, page_number):
+        entry = self.data['pages'].get(str(page_number))
+        return bool(entry) and entry['status'] == 'done'
+
+    def pending(self, page_numbers):
+        """Pages that still need scraping (never attempted or failed)"""
+        return [p for p in page_numbers if not self.is_done(p)]
+
+    def failed_pages(self):
+        return sorted(int(p) for p, entry in self.data['pages'].items() if entry['status'] == 'failed')
+
+    def mark_done(self, page_number, records, offset):
+        self.data['pages'][str(page_number)] = {
+            'status': 'done',
+            'records': records,
+            'offset': offset,
+            'finishedAt': datetime.now().isoformat(timespec='seconds'),
+        }
+        self.save()
+
+    def mark_failed(self, page_number, error=''):
+        previous = self.data['pages'].get(str(page_number), {})
+        self.data['pages'][str(page_number)] = {
+            'status': 'failed',
+            'attempts': previous.get('attempts', 0) + 1,
+            'error': error,
+            'finishedAt': datetime.now().isoformat(timespec='seconds'),
+        }
+        self.save()
+
+    def restore_output(self):
+        """Truncate the NDJSON file to the committed offset; returns that offset"""
+        offset = self.committed_offset
+        if os.path.exists(self.ndjson_file):
+            with open(self.ndjson_file, 'r+b') as f:
+                f.truncate(offset)
+        return offset
@@ -0,0 +1,101 @@
+"""
+Columnar, compact payload for the in-page table extractor
+
+The old extractor returned one object per row with nine nested
+{text, link, hasButton} objects, all of which Playwright serialized over the
+protocol. COLUMNAR_EXTRACT_JS returns instead:
+
+    n          number of rows
+    fields     field names, in column-mapping order
+    text       {field: [string per row]}
+    link       {field: {rowIndex: href}}       only non-empty links
+    buttons    {field: [32-bit words]}          bit i set = row i has a button
+    cellCount  [int per row]
+
+ColumnarRows wraps that payload as a read-only sequence and expands a row into
+the usual record dict only when it is accessed.
+"""
+
+from collections.abc import Sequence
+
+COLUMNAR_EXTRACT_JS = """({ rowSelector, columns }) => {
+    const fields = Object.keys(columns);
+    const text = {}, link = {}, buttons = {};
+    for (const f of fields) {
+        text[f] = [];
+        link[f] = {};
+        buttons[f] = [];
+    }
+    const cellCount = [];
+    let n = 0;
+
+    for (const row of document.querySelectorAll(rowSelector)) {
+        const cells = row.querySelectorAll('td');
+        if (cells.length === 0) continue;
+
+        for (const f of fields) {
+            const cell = cells[columns[f]];
+            text[f].push(cell ? (cell.innerText?.trim() || '') : '');
+            if (!cell) continue;
+
+            const a = cell.querySelector('a');
+            if (a && a.href) link[f][n] = a.href;
+            if (cell.querySelector('button')) {
+                buttons[f][n >> 5] = (buttons[f][n >> 5] | 0) | (1 << (n & 31));
+            }
+        }
+        cellCount.push(cells.length);
+        n++;
+    }
+
+    return { n, fields, text, link, buttons, cellCount };
+}"""
+
+
+class ColumnarRows(Sequence):
+    def __init__(self, payload):
+        self.n = payload['n']
+        self.fields = payload['fields']
+        self.text = payload['text']
+        self.link = payload['link']
+        self.buttons = payload['buttons']
+        self.cell_count = payload['cellCount']
+        # Constant fields added to every expanded record (e.g. 'page')
+        self.extra = {}
+
+    def __len__(self):
+        return self.n
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.record(i) for i in range(*index.indices(self.n))]
+        if index < 0:
+            index += self.n
+        if not 0 <= index < self.n:
+            raise IndexError(index)
+        return self.record(index)
+
+    def has_button(self, field, index):
+        words = self.buttons.get(field) or []
+        word = index >> 5
+        if word >= len(words) or not words[word]:
+            return False
+        return bool((words[word] & 0xFFFFFFFF) >> (index & 31) & 1)
+
+    def column(self, field):
+        """All texts of one field without expanding any record"""
+        return self.text[field]
+
+    def record(self, index):
+        """Expand one row into the legacy record dict"""
+        key = str(index)
+        row = {'rowNumber': index + 1}
+        for field in self.fields:
+            row[field] = {
+                'text': self.text[field][index],
+                'link': self.link[field].get(key, ''),
+                'hasButton': self.has_button(field, index),
+            }
+        row['cellCount'] = self.cell_count[index]
+        row.update(self.extra)
+        return row
@@ -4,6 +4,12 @@ Cookie Extraction Helper for Muraena.ai
 This script helps you extract cookies after manual login.
 It opens a browser where you can login, then automatically extracts cookies.
 
+Writes:
+- storage_state.json      Playwright storage_state (all cookies + localStorage),
+                          loaded directly by the local scrapers
+- extracted_cookies.json  auth cookies for the Apify scripts
+- extracted_cookies.py    same, as a COOKIES list to paste into a script
+
 Requirements:
     pip install playwright
     playwright install chromium
@@ -16,6 +22,8 @@ import json
 import asyncio
 from playwright.async_api import async_playwright
 
+from session_state import STORAGE_STATE_FILE
+
 
 async def extract_cookies():
     """
@@ -69,6 +77,12 @@ async def extract_cookies():
                 await browser.close()
                 return
         
+        # Save the full session (cookies + localStorage) for the local scrapers
+        state = await context.storage_state(path=STORAGE_STATE_FILE)
+        local_items = sum(len(origin['localStorage']) for origin in state['origins'])
+        print(f"💾 Session saved to: {STORAGE_STATE_FILE} "
+              f"({len(state['cookies'])} cookies, {local_items} localStorage items)")
+        
         # Extract cookies
         print("🍪 Extracting cookies...")
         cookies = await context.cookies()
@@ -146,6 +160,8 @@ async def extract_cookies():
         
         print("\n✅ Done! You can close the browser now.")
         print("\n📝 Next steps:")
+        print(f"Local scrapers pick up {STORAGE_STATE_FILE} automatically.")
+        print("For the Apify scripts:")
         print("1. Copy the COOKIES list above")
         print("2. Paste it into 'muraena_scraper_cookies.py'")
         print("3. Run: python muraena_scraper_cookies.py")
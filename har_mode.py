@@ -0,0 +1,57 @@
+"""
+HAR record/replay for offline, reproducible scraper runs
+
+Every scraper needs a live, logged-in site, so nothing can be benchmarked or
+regression-tested offline. With --record-har a normal run saves all traffic
+of its browser context to a HAR file; with --replay-har the context answers
+every request from that file via route_from_har, so the same run (navigation,
+readiness checks, reveal clicks, extraction) works without network access and
+gives repeatable timings.
+
+Usage:
+    python muraena_scraper_local.py --record-har hars/page7.har
+    python muraena_scraper_local.py --replay-har hars/page7.har
+
+A '.zip' path stores response bodies as separate files inside the archive,
+which keeps large recordings compact. Requests missing from the HAR are
+aborted (HAR_NOT_FOUND=fallback lets them reach the network instead).
+"""
+
+import os
+
+HAR_NOT_FOUND = os.getenv('HAR_NOT_FOUND', 'abort')
+
+
+def record_options(path):
+    """Extra new_context()/launch_persistent_context() kwargs to record a HAR"""
+    if not path:
+        return {}
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    return {
+        'record_har_path': path,
+        'record_har_content': 'attach' if path.endswith('.zip') else 'embed',
+        'record_har_mode': 'full',
+    }
+
+
+async def replay(context, path, not_found=HAR_NOT_FOUND):
+    """
+    Serve a context's requests from a recorded HAR.
+
+    Call before installing other routes (e.g. RequestBlocker): routes added
+    later run first and fall back to this one.
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"HAR file not found: {path}")
+    await context.route_from_har(path, not_found=not_found)
+
+
+def add_har_arguments(parser):
+    """Add the --record-har / --replay-har options to a scraper's argument parser"""
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument('--record-har', metavar='PATH',
+                       help='Save all browser traffic of this run to a HAR (.har or .zip) file')
+    group.add_argument('--replay-har', metavar='PATH',
+                       help='Run offline, answering every request from a recorded HAR file')
@@ -0,0 +1,151 @@
+"""
+Persisted page-layout cache
+
+Every run used to rediscover whether the results page is a 'tbody tr' table
+or a '[class*="CompanyRow"]' card list, which columns hold which field, and
+which reveal-button selector applies. This module stores the winning row
+selector, the column mapping and the reveal selector per URL path pattern in
+LAYOUT_CACHE_FILE. The next run checks the cached row selector with a single
+locator count; if it has no rows yet, the normal selector race runs with the
+cached selector first, and the entry is only dropped if the race does not
+match it.
+
+Entries are keyed by "<kind> <path pattern>", e.g.
+    "table /companies_search/results"
+    "cards /companies_search/results"
+"""
+
+import json
+import os
+import re
+from urllib.parse import urlsplit
+
+LAYOUT_CACHE_FILE = os.getenv('LAYOUT_CACHE_FILE', 'layout_cache.json')
+
+# Fixed cell order the table extractor has always assumed
+DEFAULT_COLUMNS = {
+    'companyName': 0,
+    'website': 1,
+    'industry': 2,
+    'location': 3,
+    'headcount': 4,
+    'email': 5,
+    'phone': 6,
+    'role': 7,
+    'additional': 8,
+}
+
+# Header keywords per field, checked in this order
+COLUMN_KEYWORDS = {
+    'companyName': ['company', 'name'],
+    'website': ['website', 'domain', 'url'],
+    'industry': ['industry', 'sector'],
+    'location': ['location', 'country', 'city', 'hq'],
+    'headcount': ['headcount', 'employees', 'size'],
+    'email': ['email'],
+    'phone': ['phone'],
+    'role': ['role', 'title', 'position'],
+}
+
+
+def layout_key(url, kind):
+    """Cache key for a URL: numeric and hex-id path segments are generalised"""
+    path = urlsplit(url).path.rstrip('/') or '/'
+    path = re.sub(r'/(\d+|[0-9a-f]{16,})(?=/|$)', '/:id', path)
+    return f'{kind} {path}'
+
+
+def map_columns(headers):
+    """Map header texts to field indices, or return DEFAULT_COLUMNS if they don't look like a header"""
+    columns = {}
+    for idx, header in enumerate(h.strip().lower() for h in headers):
+        for field, keywords in COLUMN_KEYWORDS.items():
+            if field not in columns and any(k in header for k in keywords):
+                columns[field] = idx
+                break
+
+    if len(columns) < 3:
+        return dict(DEFAULT_COLUMNS)
+
+    for field in DEFAULT_COLUMNS:
+        columns.setdefault(field, -1)
+    if columns['additional'] == -1:
+        used = set(columns.values())
+        spare = [i for i in range(len(headers)) if i not in used]
+        columns['additional'] = spare[0] if spare else -1
+    return columns
+
+
+async def discover_columns(page, row_selector):
+    """Read the header cells of the table that holds row_selector and map them to fields"""
+    headers = await page.evaluate('''(rowSelector) => {
+        const row = document.querySelector(rowSelector);
+        const table = row ? row.closest('table') : null;
+        if (!table) return [];
+        return Array.from(table.querySelectorAll('thead th')).map(th => th.innerText || '');
+    }''', row_selector)
+    return map_columns(headers)
+
+
+class LayoutCache:
+    def __init__(self, path=LAYOUT_CACHE_FILE):
+        self.path = path
+        self.entries = {}
+        if path and os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError):
+                self.entries = {}
+
+    def save(self):
+        if self.path:
+            # Atomic, with a per-process temp file: the multipage shards share this file
+            tmp_path = f'{self.path}.{os.getpid()}.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.entries, f, indent=2)
+            os.replace(tmp_path, self.path)
+
+    def get(self, url, kind):
+        return self.entries.get(layout_key(url, kind))
+
+    def update(self, url, kind, **layout):
+        """Merge layout fields into the entry for url and persist"""
+        entry = self.entries.setdefault(layout_key(url, kind), {})
+        if all(entry.get(k) == v for k, v in layout.items()):
+            return
+        entry.update(layout)
+        self.save()
+
+    def invalidate(self, url, kind):
+        if self.entries.pop(layout_key(url, kind), None) is not None:
+            self.save()
+
+    async def check(self, page, kind):
+        """
+        Return (layout, row_count) for the cached layout of the current page,
+        counting its row selector with one cheap query, or (None, 0).
+
+        A count of 0 does not drop the entry - the rows may simply not have
+        rendered yet. Callers race the cached selector with the other
+        candidates and call confirm() with the winner.
+        """
+        layout = self.get(page.url, kind)
+        if not layout or not layout.get('row_selector'):
+            return None, 0
+        return layout, await page.locator(layout['row_selector']).count()
+
+    def confirm(self, url, kind, selector):
+        """
+        Return the cached layout if the full wait matched its row selector;
+        otherwise drop the stale entry and return None.
+        """
+        layout = self.get(url, kind)
+        if layout and layout.get('row_selector') == selector:
+            return layout
+        if layout:
+            self.invalidate(url, kind)
+        return None
+
+
+layout_cache = LayoutCache()
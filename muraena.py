@@ -0,0 +1,175 @@
+#!/usr/bin/env python
+"""
+Muraena.ai scraper toolkit - single command line entry point
+
+One command for every backend. Each subcommand runs the matching script
+unchanged, but only imports it (and with it apify_client, playwright or
+pandas, plus its .env checks) when that subcommand is selected, so --help
+and light subcommands such as analyze start instantly.
+
+Usage:
+    python muraena.py --help
+    python muraena.py apify                       # Apify actor, automated login
+    python muraena.py apify --variant cookies     # Apify actor, hard-coded cookies
+    python muraena.py local --cache
+    python muraena.py multipage --pages 10 --concurrency 4
+    python muraena.py profile
+    python muraena.py extract-session
+    python muraena.py analyze                     # latest muraena_results_* file
+    python muraena.py analyze muraena_results_20241211_143052.ndjson
+    python muraena.py report                      # Apify run speed/cost per configuration
+
+Everything after the subcommand is passed on to the script, e.g.
+`python muraena.py local --help` shows the local scraper's own options.
+"""
+
+import argparse
+import glob
+import os
+import runpy
+import sys
+
+# Subcommand -> (module, description)
+SCRIPTS = {
+    'local': ('muraena_scraper_local', 'Scrape one results page with Playwright on this machine'),
+    'multipage': ('muraena_scraper_multipage', 'Scrape a range of results pages with Playwright'),
+    'profile': ('muraena_scraper_profile', 'Scrape with your existing Chrome/Edge profile'),
+    'extract-session': ('extract_cookies', 'Log in manually and save cookies + storage_state.json'),
+}
+
+APIFY_VARIANTS = {
+    'login': 'muraena_scraper',
+    'cookies': 'muraena_scraper_cookies',
+    'your-cookies': 'muraena_scraper_with_your_cookies',
+}
+
+ANALYZE_FIELDS = ['companyName', 'website', 'industry', 'location', 'headcount', 'email', 'phone', 'role']
+
+
+def run_script(module, args):
+    """Run a scraper script as if it was started directly, with its own argv"""
+    sys.argv = [f'{module}.py'] + list(args)
+    runpy.run_module(module, run_name='__main__', alter_sys=True)
+
+
+def latest_results_file():
+    """Newest muraena_results_* NDJSON (or JSON) file in the current directory"""
+    for pattern in ('muraena_results_*.ndjson', 'muraena_results_*.json'):
+        files = sorted(glob.glob(pattern), key=os.path.getmtime)
+        if files:
+            return files[-1]
+    return None
+
+
+def load_results(path):
+    if path.endswith('.ndjson'):
+        from result_sink import iter_records
+        return list(iter_records(path))
+    import json
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def field_text(record, field):
+    value = record.get(field, '')
+    return value.get('text', '') if isinstance(value, dict) else (value or '')
+
+
+def analyze(path):
+    """Print record counts, duplicates and field fill rates of a results file"""
+    path = path or latest_results_file()
+    if not path:
+        print("❌ No muraena_results_* file found - pass a path")
+        return 1
+    if not os.path.exists(path):
+        print(f"❌ Results file not found: {path}")
+        return 1
+
+    records = load_results(path)
+    print(f"📄 {path}")
+    print(f"📊 Total records: {len(records)}")
+    if not records:
+        return 0
+
+    keys = [
+        (r.get('companyName') or {}).get('link') or field_text(r, 'companyName')
+        for r in records
+    ]
+    named = [k for k in keys if k]
+    print(f"   Non-empty company names: {len(named)}")
+    print(f"   Unique companies: {len(set(named))} ({len(named) - len(set(named))} duplicates)")
+
+    print("\n📋 Field fill rate:")
+    for field in ANALYZE_FIELDS:
+        filled = sum(1 for r in records if field_text(r, field).strip())
+        print(f"   {field:<12} {filled:6d}  {filled / len(records):6.1%}")
+
+    pages = {}
+    for r in records:
+        if 'page' in r:
+            pages[r['page']] = pages.get(r['page'], 0) + 1
+    if pages:
+        print(f"\n📄 Pages: {len(pages)} ({min(pages)}-{max(pages)}), "
+              f"{min(pages.values())}-{max(pages.values())} records per page")
+
+    sources = {}
+    for r in records:
+        source = r.get('source', 'dom')
+        sources[source] = sources.get(source, 0) + 1
+    print(f"\n🔎 Sources: {', '.join(f'{k}={v}' for k, v in sorted(sources.items()))}")
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog='muraena',
+        description='Muraena.ai scraper toolkit',
+        epilog='Options after a scraper subcommand are passed on to that script.',
+    )
+    subparsers = parser.add_subparsers(dest='command', metavar='COMMAND')
+    subparsers.required = True
+
+    apify = subparsers.add_parser('apify', help='Run the scraper on Apify (needs APIFY_API_TOKEN)')
+    apify.add_argument('--variant', choices=sorted(APIFY_VARIANTS), default='login',
+                       help='login = email/password login, cookies / your-cookies = hard-coded session '
+                            '(default: login)')
+
+    for name, (_, description) in SCRIPTS.items():
+        # add_help=False so `muraena local --help` reaches the script's own parser
+        subparsers.add_parser(name, help=description, add_help=False)
+
+    analyze_parser = subparsers.add_parser('analyze', help='Summarize a results file (no scraping)')
+    analyze_parser.add_argument('path', nargs='?', help='NDJSON or JSON results file (default: newest)')
+
+    report_parser = subparsers.add_parser('report', help='Compare recorded Apify runs (duration, cost, speed)')
+    report_parser.add_argument('--hash', help='Show every run of one configuration (input hash prefix)')
+    report_parser.add_argument('--limit', type=int, default=20, help='Rows to show (default: 20)')
+    report_parser.add_argument('--db', help='Stats database (default: APIFY_STATS_DB or apify_runs.sqlite)')
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    # Unknown options belong to the selected script
+    args, script_args = parser.parse_known_args(argv)
+
+    if args.command == 'analyze':
+        if script_args:
+            parser.error(f"unrecognized arguments: {' '.join(script_args)}")
+        return analyze(args.path)
+    if args.command == 'report':
+        if script_args:
+            parser.error(f"unrecognized arguments: {' '.join(script_args)}")
+        import run_stats
+        return run_stats.report(args.db or run_stats.STATS_DB, args.hash, args.limit)
+    if args.command == 'apify':
+        run_script(APIFY_VARIANTS[args.variant], script_args)
+        return 0
+
+    module, _ = SCRIPTS[args.command]
+    run_script(module, script_args)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,12 +1,16 @@
+import argparse
 import os
-import time
-import json
 from apify_client import ApifyClient
 from dotenv import load_dotenv
 
-# Load environment variables from .env file
+# Load environment variables first: the modules below read their settings on import
 load_dotenv()
 
+from page_readiness import readiness_helper_js
+from screenshot_policy import screenshot_helper_js
+from apify_log import log_tail, LOG_FILE
+from apify_backend import run_scraper_actor, add_fanout_arguments, download_artifacts, ARTIFACT_PATTERNS
+
 # Get credentials from environment variables
 APIFY_API_TOKEN = os.getenv('APIFY_API_TOKEN')
 MURAENA_EMAIL = os.getenv('MURAENA_EMAIL')
@@ -49,20 +53,85 @@ run_input = {
     "maxRequestsPerCrawl": 100,
     "pageFunction": f"""async function pageFunction(context) {{
     const {{ page, request, log }} = context;
+    {readiness_helper_js()}
+    {screenshot_helper_js()}
+    
+    // Scrapes the results page the browser is on; shot names the page's screenshot
+    const scrapeResults = async (shot = 'step5_search_results') => {{
+        log.info('=== SCRAPING DATA ===');
+        
+        if (page.url().includes('login')) {{
+            throw new Error('Redirected to login');
+        }}
+        
+        await snap(page, shot);
+        
+        const tableSelectors = [
+            'table tbody tr',
+            '.ant-table-tbody tr',
+            '[class*="Table"] tbody tr',
+            'tbody tr'
+        ];
+        
+        // Race all candidates at once instead of waiting 5 s per miss
+        const rowsSelector = await Promise.any(tableSelectors.map(
+            selector => page.waitForSelector(selector, {{ timeout: 5000 }}).then(() => selector)
+        )).catch(() => null);
+        if (rowsSelector) {{
+            const rowCount = await page.$$eval(rowsSelector, rows => rows.length);
+            log.info(`✓ Found ${{rowCount}} rows using: ${{rowsSelector}}`);
+        }}
+        
+        if (!rowsSelector) {{
+            const bodyText = await page.$eval('body', el => el.innerText).catch(() => 'Unable to read');
+            log.error('❌ No table found');
+            throw new Error('No results table found');
+        }}
+        
+        const results = await page.$$eval(rowsSelector, (rows) => {{
+            return rows.map((row, idx) => {{
+                const cells = row.querySelectorAll('td');
+                if (cells.length === 0) return null;
+                
+                return {{
+                    rowNumber: idx + 1,
+                    companyName: cells[0]?.innerText?.trim() || '',
+                    companyUrl: cells[0]?.querySelector('a')?.href || '',
+                    website: cells[1]?.querySelector('a')?.href || cells[0]?.querySelector('a')?.href || '',
+                    industry: cells[2]?.innerText?.trim() || '',
+                    location: cells[3]?.innerText?.trim() || '',
+                    headcount: cells[4]?.innerText?.trim() || '',
+                    email: cells[5]?.innerText?.trim() || (cells[5]?.querySelector('button') ? 'REVEAL_REQUIRED' : ''),
+                    phone: cells[6]?.innerText?.trim() || (cells[6]?.querySelector('button') ? 'REVEAL_REQUIRED' : ''),
+                    role: cells[7]?.innerText?.trim() || '',
+                    cellCount: cells.length
+                }};
+            }}).filter(item => item !== null && item.companyName);
+        }});
+        
+        log.info(`✅ Extracted ${{results.length}} records`);
+        
+        if (results.length > 0) {{
+            log.info('Sample: ' + JSON.stringify(results[0]));
+        }}
+        
+        return {{
+            success: true,
+            results,
+            pageUrl: page.url(),
+            totalRecords: results.length,
+            scrapedAt: new Date().toISOString()
+        }};
+    }};
     
     if (request.userData.label === 'LOGIN') {{
         log.info('=== STARTING LOGIN PROCESS ===');
         
         try {{
-            await page.waitForLoadState('networkidle', {{ timeout: 15000 }});
-            await page.waitForTimeout(3000);
-            
             log.info('Looking for login form...');
-            await page.waitForSelector('#registration', {{ timeout: 10000 }});
+            await page.waitForSelector('#registration', {{ timeout: 25000 }});
             log.info('✓ Login form found');
             
-            await page.waitForTimeout(2000);
-            
             // STEP 1: Fill email
             const emailInputs = await page.$$('#registration input[type="text"], #registration input[type="email"]');
             log.info(`Found ${{emailInputs.length}} email input fields`);
@@ -73,10 +142,9 @@ run_input = {
             
             log.info('Filling email field...');
             await emailInputs[0].fill('{MURAENA_EMAIL}');
-            await page.waitForTimeout(1000);
             log.info('✓ Email filled');
             
-            await page.screenshot({{ path: 'step1_email_filled.png', fullPage: true }});
+            await snap(page, 'step1_email_filled');
             
             // Click Continue button
             const continueSelectors = [
@@ -108,13 +176,12 @@ run_input = {
                 log.info('No continue button found, checking if password field exists...');
             }} else {{
                 log.info('Waiting for password field...');
-                await page.waitForTimeout(3000);
+                await page.waitForSelector('#registration input[type="password"]', {{ timeout: 5000 }}).catch(() => {{}});
             }}
             
-            await page.screenshot({{ path: 'step2_after_continue.png', fullPage: true }});
+            await snap(page, 'step2_after_continue');
             
             // STEP 2: Fill password
-            await page.waitForTimeout(2000);
             const passwordInputs = await page.$$('#registration input[type="password"]');
             log.info(`Found ${{passwordInputs.length}} password fields`);
             
@@ -125,7 +192,6 @@ run_input = {
                 if (allInputs.length >= 2) {{
                     log.info('Using second input as password...');
                     await allInputs[1].fill('{MURAENA_PASSWORD}');
-                    await page.waitForTimeout(1000);
                     log.info('✓ Password filled (second input)');
                 }} else {{
                     log.info('Only 1 input - might be single-step login');
@@ -133,11 +199,10 @@ run_input = {
             }} else {{
                 log.info('Filling password field...');
                 await passwordInputs[0].fill('{MURAENA_PASSWORD}');
-                await page.waitForTimeout(1000);
                 log.info('✓ Password filled');
             }}
             
-            await page.screenshot({{ path: 'step3_before_submit.png', fullPage: true }});
+            await snap(page, 'step3_before_submit');
             
             // STEP 3: Submit
             const submitSelectors = [
@@ -171,9 +236,9 @@ run_input = {
             }}
             
             log.info('Waiting for navigation...');
-            await page.waitForTimeout(6000);
+            await page.waitForURL(url => !/login|signin/.test(url.toString()), {{ timeout: 15000 }}).catch(() => {{}});
             
-            await page.screenshot({{ path: 'step4_after_login.png', fullPage: true }});
+            await snap(page, 'step4_after_login');
             
             const currentUrl = page.url();
             log.info(`Current URL: ${{currentUrl}}`);
@@ -183,78 +248,39 @@ run_input = {
             if (isLoggedIn) {{
                 log.info('✅ LOGIN SUCCESSFUL!');
                 
-                log.info('Navigating to search results...');
-                await page.goto('{TARGET_URL}', {{ waitUntil: 'networkidle', timeout: 30000 }});
-                await page.waitForTimeout(4000);
-                log.info('✓ At search results page');
-                
-                log.info('=== SCRAPING DATA ===');
-                
-                if (page.url().includes('login')) {{
-                    throw new Error('Redirected to login');
-                }}
-                
-                await page.screenshot({{ path: 'step5_search_results.png', fullPage: true }});
-                
-                const tableSelectors = [
-                    'table tbody tr',
-                    '.ant-table-tbody tr',
-                    '[class*="Table"] tbody tr',
-                    'tbody tr'
-                ];
-                
-                let rowsSelector = null;
-                for (const selector of tableSelectors) {{
-                    try {{
-                        await page.waitForSelector(selector, {{ timeout: 5000 }});
-                        const rowCount = await page.$$eval(selector, rows => rows.length);
-                        log.info(`✓ Found ${{rowCount}} rows: ${{selector}}`);
-                        rowsSelector = selector;
-                        break;
-                    }} catch (e) {{
-                        log.info(`Not found: ${{selector}}`);
+                // Fan-out runs log in once and visit every results page in this page:
+                // the auth token lives in this browser's localStorage, and a separate
+                // request could get another session or browser
+                const targetUrls = request.userData.targetUrls;
+                if (targetUrls) {{
+                    const pushData = context.pushData || ((data) => (context.Actor || context.Apify).pushData(data));
+                    let failed = 0;
+                    for (const [i, url] of targetUrls.entries()) {{
+                        try {{
+                            await page.goto(url, {{ waitUntil: 'domcontentloaded', timeout: 30000 }});
+                            const ready = await waitUntilReady(page);
+                            log.info(`✓ Page ${{i + 1}}/${{targetUrls.length}} (${{ready.rows}} rows after ${{ready.elapsedMs}} ms)`);
+                            await pushData(await scrapeResults(`step5_search_results_${{i + 1}}`));
+                        }} catch (error) {{
+                            failed++;
+                            log.error(`❌ Page ${{i + 1}} (${{url}}): ${{error.message}}`);
+                            await snap(page, `error_page_${{i + 1}}`, true);
+                            await pushData({{ success: false, pageUrl: url, error: error.message, scrapedAt: new Date().toISOString() }});
+                        }}
                     }}
+                    if (failed === targetUrls.length) {{
+                        throw new Error(`All ${{failed}} results pages failed`);
+                    }}
+                    log.info(`✓ Scraped ${{targetUrls.length - failed}}/${{targetUrls.length}} results pages`);
+                    return;
                 }}
                 
-                if (!rowsSelector) {{
-                    const bodyText = await page.$eval('body', el => el.innerText).catch(() => 'Unable to read');
-                    log.error('❌ No table found');
-                    throw new Error('No results table found');
-                }}
-                
-                const results = await page.$$eval(rowsSelector, (rows) => {{
-                    return rows.map((row, idx) => {{
-                        const cells = row.querySelectorAll('td');
-                        if (cells.length === 0) return null;
-                        
-                        return {{
-                            rowNumber: idx + 1,
-                            companyName: cells[0]?.innerText?.trim() || '',
-                            website: cells[1]?.querySelector('a')?.href || cells[0]?.querySelector('a')?.href || '',
-                            industry: cells[2]?.innerText?.trim() || '',
-                            location: cells[3]?.innerText?.trim() || '',
-                            headcount: cells[4]?.innerText?.trim() || '',
-                            email: cells[5]?.innerText?.trim() || (cells[5]?.querySelector('button') ? 'REVEAL_REQUIRED' : ''),
-                            phone: cells[6]?.innerText?.trim() || (cells[6]?.querySelector('button') ? 'REVEAL_REQUIRED' : ''),
-                            role: cells[7]?.innerText?.trim() || '',
-                            cellCount: cells.length
-                        }};
-                    }}).filter(item => item !== null && item.companyName);
-                }});
-                
-                log.info(`✅ Extracted ${{results.length}} records`);
-                
-                if (results.length > 0) {{
-                    log.info('Sample: ' + JSON.stringify(results[0]));
-                }}
+                log.info('Navigating to search results...');
+                await page.goto('{TARGET_URL}', {{ waitUntil: 'domcontentloaded', timeout: 30000 }});
+                const ready = await waitUntilReady(page);
+                log.info(`✓ At search results page (${{ready.rows}} rows after ${{ready.elapsedMs}} ms)`);
                 
-                return {{
-                    success: true,
-                    results,
-                    pageUrl: page.url(),
-                    totalRecords: results.length,
-                    scrapedAt: new Date().toISOString()
-                }};
+                return await scrapeResults();
                 
             }} else {{
                 throw new Error('Login failed - still on login page');
@@ -262,7 +288,7 @@ run_input = {
             
         }} catch (error) {{
             log.error(`❌ ERROR: ${{error.message}}`);
-            await page.screenshot({{ path: 'error_screenshot.png', fullPage: true }});
+            await snap(page, 'error_screenshot', true);
             throw error;
         }}
     }}
@@ -285,11 +311,14 @@ run_input = {
     "postNavigationHooks": """[
     async (crawlingContext) => {
         const { page, log } = crawlingContext;
-        
-        await page.waitForTimeout(2000);
+        """ + readiness_helper_js() + """
         
         if (page.url().includes('search/results') || page.url().includes('companies_search')) {
             try {
+                // Reveal buttons only exist once the results table has rendered
+                const ready = await waitUntilReady(page);
+                log.info(`Results ready (${ready.rows} rows after ${ready.elapsedMs} ms)`);
+                
                 log.info('Looking for reveal buttons...');
                 
                 const revealButtons = await page.$$('button:has-text("Reveal")');
@@ -307,7 +336,7 @@ run_input = {
                     }
                     
                     log.info('✓ Clicked reveal buttons');
-                    await page.waitForTimeout(1500);
+                    await waitUntilReady(page);  // Wait for revealed data to settle
                 }
             } catch (e) {
                 log.info('Error with reveal buttons: ' + e.message);
@@ -329,101 +358,36 @@ run_input = {
         }
     ],
     "useChrome": False,
-    "waitUntil": "networkidle"
+    "waitUntil": "domcontentloaded"
 }
 
 
-def run_scraper():
-    """Run the Muraena.ai scraper"""
+def run_scraper(args=None):
+    """Run the Muraena.ai scraper; returns the record count, or None if the run failed"""
     print("🚀 Starting Muraena.ai scraper...")
     print(f"📍 Target URL: {TARGET_URL[:80]}...")
     
     try:
         # Run the Actor using Playwright Scraper
         print("📤 Sending scraper configuration to Apify...")
-        run = client.actor("apify/playwright-scraper").call(run_input=run_input)
-        
-        print(f"✅ Actor run started: {run['id']}")
-        print(f"🔗 View run: https://console.apify.com/actors/runs/{run['id']}")
-        
-        # Wait for the run to finish
-        print("⏳ Waiting for scraper to complete...")
-        
-        # Get the run details
-        run_client = client.run(run['id'])
-        
-        # Wait for completion (check every 10 seconds)
-        while True:
-            run_info = run_client.get()
-            status = run_info['status']
-            
-            print(f"📊 Status: {status}")
-            
-            if status in ['SUCCEEDED', 'FAILED', 'ABORTED', 'TIMED-OUT']:
-                break
-            
-            time.sleep(10)
+        run, item_count, record_count = run_scraper_actor(client, run_input, TARGET_URL, args)
+        status = run['status']
         
         if status == 'SUCCEEDED':
             print("✅ Scraper completed successfully!")
             
-            # Fetch results from the dataset
-            print("📥 Fetching results...")
-            dataset_id = run['defaultDatasetId']
-            dataset_client = client.dataset(dataset_id)
-            
-            # Get all items from the dataset
-            items = list(dataset_client.iterate_items())
-            
-            if items:
-                print(f"\n📊 RESULTS: Found {len(items)} item(s)")
-                
-                # Save to JSON file
-                output_file = 'muraena_results.json'
-                with open(output_file, 'w', encoding='utf-8') as f:
-                    json.dump(items, f, indent=2, ensure_ascii=False)
-                
-                print(f"💾 Results saved to: {output_file}")
-                
-                # Display summary
-                for idx, item in enumerate(items):
-                    if 'results' in item:
-                        print(f"\n📋 Item {idx + 1}:")
-                        print(f"   Total records: {item.get('totalRecords', 0)}")
-                        print(f"   Page URL: {item.get('pageUrl', 'N/A')}")
-                        print(f"   Scraped at: {item.get('scrapedAt', 'N/A')}")
-                        
-                        if item['results']:
-                            print(f"\n   Sample records:")
-                            for i, record in enumerate(item['results'][:3]):
-                                print(f"   {i+1}. {record.get('companyName', 'N/A')}")
-                                print(f"      Industry: {record.get('industry', 'N/A')}")
-                                print(f"      Location: {record.get('location', 'N/A')}")
-                                print(f"      Email: {record.get('email', 'N/A')}")
-                                print(f"      Phone: {record.get('phone', 'N/A')}")
-                
-                return items
-            else:
+            if not item_count:
                 print("⚠️ No results found in dataset")
-                return []
+            return record_count
         
         else:
             print(f"❌ Scraper failed with status: {status}")
             
-            # Get log
-            print("\n📜 Fetching logs...")
-            log_client = client.log(run['id'])
-            log_content = log_client.get()
-            
-            # Save log to file
-            log_file = 'scraper_error.log'
-            with open(log_file, 'w') as f:
-                f.write(log_content)
-            
-            print(f"📝 Error log saved to: {log_file}")
+            # The log was tailed live into the rolling log file while the run executed
+            print(f"📝 Run log saved to: {LOG_FILE}")
             print("\nLast 50 lines of log:")
             print("=" * 60)
-            print('\n'.join(log_content.split('\n')[-50:]))
+            print('\n'.join(log_tail(client, run['id'], 50)))
             
             return None
     
@@ -434,8 +398,8 @@ def run_scraper():
         return None
 
 
-def download_screenshots(run_id):
-    """Download screenshots from the Apify run"""
+def download_screenshots(run_id, patterns=ARTIFACT_PATTERNS):
+    """Download screenshots (or other artifacts matching patterns) from the Apify run"""
     print(f"\n📸 Downloading screenshots from run: {run_id}")
     
     try:
@@ -444,46 +408,31 @@ def download_screenshots(run_id):
         kv_store_id = run_info['defaultKeyValueStoreId']
         kv_store = client.key_value_store(kv_store_id)
         
-        # List of screenshot names to download
-        screenshots = [
-            'step1_email_filled.png',
-            'step2_after_continue.png',
-            'step3_before_submit.png',
-            'step4_after_login.png',
-            'step5_search_results.png',
-            'error_screenshot.png'
-        ]
+        downloaded, skipped, failed = download_artifacts(kv_store, patterns, 'screenshots')
         
-        os.makedirs('screenshots', exist_ok=True)
-        
-        for screenshot in screenshots:
-            try:
-                record = kv_store.get_record(screenshot)
-                if record and record['value']:
-                    filepath = os.path.join('screenshots', screenshot)
-                    with open(filepath, 'wb') as f:
-                        f.write(record['value'])
-                    print(f"✅ Downloaded: {screenshot}")
-            except Exception as e:
-                print(f"⚠️ Could not download {screenshot}: {str(e)}")
-        
-        print(f"📁 Screenshots saved to: screenshots/")
+        print(f"📁 Screenshots saved to: screenshots/ "
+              f"({downloaded} downloaded, {skipped} already there, {failed} failed)")
     
     except Exception as e:
         print(f"❌ Error downloading screenshots: {str(e)}")
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Muraena.ai scraper on Apify (automated login)')
+    add_fanout_arguments(parser)
+    args = parser.parse_args()
+    
     print("=" * 60)
     print("  MURAENA.AI SCRAPER - Python + Apify API")
     print("=" * 60)
     
     # Run the scraper
-    results = run_scraper()
+    results = run_scraper(args)
     
-    if results:
+    # 0 records is still a successful run; None means it failed
+    if results is not None:
         print("\n✅ Scraping completed successfully!")
-        print(f"📊 Total results: {sum(len(item.get('results', [])) for item in results)}")
+        print(f"📊 Total results: {results}")
         
         # Optionally download screenshots
         # run_id = input("\nEnter run ID to download screenshots (or press Enter to skip): ").strip()
@@ -1,12 +1,17 @@
+import argparse
 import os
-import time
 import json
 from apify_client import ApifyClient
 from dotenv import load_dotenv
 
-# Load environment variables from .env file
+# Load environment variables first: the modules below read their settings on import
 load_dotenv()
 
+from page_readiness import readiness_helper_js
+from screenshot_policy import screenshot_helper_js
+from apify_log import log_tail, LOG_FILE
+from apify_backend import run_scraper_actor, add_fanout_arguments
+
 # Get credentials from environment variables
 APIFY_API_TOKEN = os.getenv('APIFY_API_TOKEN')
 TARGET_URL = os.getenv('TARGET_URL')
@@ -73,14 +78,16 @@ run_input = {
     "maxRequestsPerCrawl": 100,
     "pageFunction": f"""async function pageFunction(context) {{
     const {{ page, request, log }} = context;
+    {readiness_helper_js()}
+    {screenshot_helper_js()}
     
     try {{
         log.info('=== STARTING DATA EXTRACTION ===');
         
         // Add cookies if they were set in preNavigationHooks
         log.info('Waiting for page to load...');
-        await page.waitForLoadState('networkidle', {{ timeout: 15000 }});
-        await page.waitForTimeout(3000);
+        const ready = await waitUntilReady(page);
+        log.info(`Page ready: ${{ready.rows}} rows after ${{ready.elapsedMs}} ms${{ready.timedOut ? ' (timed out)' : ''}}`);
         
         const currentUrl = page.url();
         log.info(`Current URL: ${{currentUrl}}`);
@@ -93,7 +100,7 @@ run_input = {
         }}
         
         log.info('✅ Successfully authenticated!');
-        await page.screenshot({{ path: 'authenticated_page.png', fullPage: true }});
+        await snap(page, 'authenticated_page');
         
         log.info('=== SCRAPING DATA ===');
         
@@ -105,26 +112,22 @@ run_input = {
             'tbody tr'
         ];
         
-        let rowsSelector = null;
-        for (const selector of tableSelectors) {{
-            try {{
-                await page.waitForSelector(selector, {{ timeout: 10000 }});
-                const rowCount = await page.$$eval(selector, rows => rows.length);
-                log.info(`✓ Found ${{rowCount}} rows using: ${{selector}}`);
-                rowsSelector = selector;
-                break;
-            }} catch (e) {{
-                log.info(`Selector not found: ${{selector}}`);
-            }}
+        // Race all candidates at once instead of waiting 10 s per miss
+        const rowsSelector = await Promise.any(tableSelectors.map(
+            selector => page.waitForSelector(selector, {{ timeout: 10000 }}).then(() => selector)
+        )).catch(() => null);
+        if (rowsSelector) {{
+            const rowCount = await page.$$eval(rowsSelector, rows => rows.length);
+            log.info(`✓ Found ${{rowCount}} rows using: ${{rowsSelector}}`);
         }}
         
         if (!rowsSelector) {{
             log.error('❌ No table found');
-            await page.screenshot({{ path: 'no_table_error.png', fullPage: true }});
+            await snap(page, 'no_table_error', true);
             throw new Error('No results table found');
         }}
         
-        await page.screenshot({{ path: 'before_reveal.png', fullPage: true }});
+        await snap(page, 'before_reveal');
         
         // Click reveal buttons to uncover contact info
         log.info('Looking for "Reveal" buttons...');
@@ -143,8 +146,8 @@ run_input = {
             }}
             
             log.info('✓ Clicked reveal buttons');
-            await page.waitForTimeout(2000);
-            await page.screenshot({{ path: 'after_reveal.png', fullPage: true }});
+            await waitUntilReady(page);
+            await snap(page, 'after_reveal');
         }} else {{
             log.info('No reveal buttons found - data may already be visible');
         }}
@@ -204,7 +207,7 @@ run_input = {
         
     }} catch (error) {{
         log.error(`❌ ERROR: ${{error.message}}`);
-        await page.screenshot({{ path: 'error_screenshot.png', fullPage: true }});
+        await snap(page, 'error_screenshot', true);
         throw error;
     }}
 }}""",
@@ -237,7 +240,6 @@ run_input = {
     async (crawlingContext) => {
         const { page, log } = crawlingContext;
         
-        await page.waitForTimeout(2000);
         log.info('✓ Post-navigation completed');
     }
 ]""",
@@ -252,12 +254,12 @@ run_input = {
         }
     ],
     "useChrome": False,
-    "waitUntil": "networkidle"
+    "waitUntil": "domcontentloaded"
 }
 
 
-def run_scraper():
-    """Run the Muraena.ai scraper with session cookies"""
+def run_scraper(args=None):
+    """Run the Muraena.ai scraper with session cookies; returns the record count, or None if the run failed"""
     print("🚀 Starting Muraena.ai scraper (Cookie-based authentication)...")
     print(f"📍 Target URL: {TARGET_URL[:80]}...")
     
@@ -298,91 +300,24 @@ def run_scraper():
     try:
         # Run the Actor
         print("\n📤 Sending scraper configuration to Apify...")
-        run = client.actor("apify/playwright-scraper").call(run_input=run_input)
-        
-        print(f"✅ Actor run started: {run['id']}")
-        print(f"🔗 View run: https://console.apify.com/actors/runs/{run['id']}")
-        
-        # Wait for completion
-        print("⏳ Waiting for scraper to complete...")
-        
-        run_client = client.run(run['id'])
-        
-        while True:
-            run_info = run_client.get()
-            status = run_info['status']
-            
-            print(f"📊 Status: {status}")
-            
-            if status in ['SUCCEEDED', 'FAILED', 'ABORTED', 'TIMED-OUT']:
-                break
-            
-            time.sleep(10)
+        run, item_count, record_count = run_scraper_actor(client, run_input, TARGET_URL, args)
+        status = run['status']
         
         if status == 'SUCCEEDED':
             print("✅ Scraper completed successfully!")
             
-            # Fetch results
-            print("📥 Fetching results...")
-            dataset_id = run['defaultDatasetId']
-            dataset_client = client.dataset(dataset_id)
-            
-            items = list(dataset_client.iterate_items())
-            
-            if items:
-                print(f"\n📊 RESULTS: Found {len(items)} item(s)")
-                
-                # Save results
-                output_file = 'muraena_results.json'
-                with open(output_file, 'w', encoding='utf-8') as f:
-                    json.dump(items, f, indent=2, ensure_ascii=False)
-                
-                print(f"💾 Results saved to: {output_file}")
-                
-                # Display summary
-                for idx, item in enumerate(items):
-                    if 'results' in item:
-                        print(f"\n📋 Item {idx + 1}:")
-                        print(f"   Total records: {item.get('totalRecords', 0)}")
-                        print(f"   Page URL: {item.get('pageUrl', 'N/A')}")
-                        print(f"   Scraped at: {item.get('scrapedAt', 'N/A')}")
-                        
-                        if item['results']:
-                            print(f"\n   Sample records:")
-                            for i, record in enumerate(item['results'][:3]):
-                                company = record.get('companyName', {})
-                                print(f"   {i+1}. {company.get('text', 'N/A') if isinstance(company, dict) else company}")
-                                
-                                email = record.get('email', {})
-                                phone = record.get('phone', {})
-                                
-                                email_text = email.get('text', 'N/A') if isinstance(email, dict) else email
-                                phone_text = phone.get('text', 'N/A') if isinstance(phone, dict) else phone
-                                
-                                print(f"      Email: {email_text}")
-                                print(f"      Phone: {phone_text}")
-                
-                return items
-            else:
-                print("⚠️ No results found")
-                return []
+            if not item_count:
+                print("⚠️ No results found in dataset")
+            return record_count
         
         else:
             print(f"❌ Scraper failed with status: {status}")
             
-            # Get logs
-            print("\n📜 Fetching logs...")
-            log_client = client.log(run['id'])
-            log_content = log_client.get()
-            
-            log_file = 'scraper_error.log'
-            with open(log_file, 'w') as f:
-                f.write(log_content)
-            
-            print(f"📝 Error log saved to: {log_file}")
+            # The log was tailed live into the rolling log file while the run executed
+            print(f"📝 Run log saved to: {LOG_FILE}")
             print("\nLast 30 lines of log:")
             print("=" * 60)
-            print('\n'.join(log_content.split('\n')[-30:]))
+            print('\n'.join(log_tail(client, run['id'], 30)))
             
             return None
     
@@ -394,15 +329,19 @@ def run_scraper():
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Muraena.ai scraper on Apify (session cookies)')
+    add_fanout_arguments(parser)
+    args = parser.parse_args()
+    
     print("=" * 60)
     print("  MURAENA.AI SCRAPER - Cookie-Based Authentication")
     print("=" * 60)
     
-    results = run_scraper()
+    results = run_scraper(args)
     
-    if results:
+    # 0 records is still a successful run; None means it failed
+    if results is not None:
         print("\n✅ Scraping completed successfully!")
-        total_records = sum(len(item.get('results', [])) for item in results)
-        print(f"📊 Total results: {total_records}")
+        print(f"📊 Total results: {results}")
     else:
         print("\n❌ Scraping failed. Check the logs above.")
\ No newline at end of file
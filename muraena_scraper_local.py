@@ -18,25 +18,43 @@ Requirements:
 
 Usage:
     python muraena_scraper_local.py
+    python muraena_scraper_local.py --connect   # attach to browser_server.py
+    python muraena_scraper_local.py --cache     # reuse the page from .cache/ if fresh
+    python muraena_scraper_local.py --record-har hars/page.har   # then --replay-har offline
 """
 
+import argparse
 import asyncio
-import json
 import os
 from datetime import datetime
 from playwright.async_api import async_playwright
 from dotenv import load_dotenv
-import csv
 
-# Load environment variables
+# Load environment variables first: the modules below read their settings on import
 load_dotenv()
 
+from network_capture import SearchResponseCapture
+from result_sink import NdjsonSink, export_json, export_csv
+from request_blocker import RequestBlocker, BLOCK_REQUESTS
+from page_readiness import wait_until_ready
+from selector_race import race_selectors
+from layout_cache import layout_cache, discover_columns, DEFAULT_COLUMNS
+from browser_server import launch_or_connect, default_endpoint
+from columnar_rows import ColumnarRows, COLUMNAR_EXTRACT_JS
+from session_state import load_storage_state, probe_session, STORAGE_STATE_FILE
+from response_cache import ResponseCache, records_from_entry, CACHE
+import har_mode
+from screenshot_policy import ScreenshotPolicy
+
 # Configuration
 TARGET_URL = os.getenv('TARGET_URL', 'https://app.muraena.ai/companies_search/results')
 HEADLESS = os.getenv('HEADLESS', 'false').lower() == 'true'
 TIMEOUT = int(os.getenv('TIMEOUT', '30000'))
+# 'dom' walks the rendered table, 'network' reads the search API JSON the page downloads
+EXTRACT_MODE = os.getenv('EXTRACT_MODE', 'dom').lower()
 
 # Your cookies from EditThisCookie
+# (only used when there is no storage_state.json from extract_cookies.py)
 COOKIES = [
     {
         "name": "_ga",
@@ -97,11 +115,29 @@ LOCAL_STORAGE = {
 
 
 class MuraenaScraper:
-    def __init__(self):
+    def __init__(self, blocker=None, endpoint=None, cache=None, record_har=None, replay_har=None,
+                 screenshots=None):
+        self.playwright = None
+        self.endpoint = endpoint
         self.browser = None
         self.context = None
         self.page = None
         self.results = []
+        self.capture = SearchResponseCapture() if EXTRACT_MODE == 'network' else None
+        self.blocker = blocker or (RequestBlocker() if BLOCK_REQUESTS else None)
+        self.columns = dict(DEFAULT_COLUMNS)
+        self.reveal_selector = None
+        self.cache = cache
+        self.current_url = None
+        self.record_har = record_har
+        self.replay_har = replay_har
+        self.screenshots = screenshots or ScreenshotPolicy()
+        # Whether the current page gets happy-path screenshots, and a file name prefix for it
+        self.sampled = True
+        self.shot_prefix = ''
+        # Outcome of the last navigation, read by the adaptive concurrency controller
+        self.last_status = None
+        self.last_failure = None
         
     async def setup(self):
         """Initialize browser and authentication"""
@@ -110,98 +146,172 @@ class MuraenaScraper:
         print(f"👁️  Headless mode: {HEADLESS}")
         print()
         
-        playwright = await async_playwright().start()
+        self.playwright = await async_playwright().start()
         
-        # Launch browser
-        print("🌐 Launching browser...")
-        self.browser = await playwright.chromium.launch(
-            headless=HEADLESS,
-            args=['--no-sandbox']
-        )
+        # Launch browser (or attach to a warm one)
+        self.browser = await launch_or_connect(self.playwright, self.endpoint, HEADLESS)
         
-        # Create context with cookies
+        await self.open_context(self.browser)
+        
+        print("✅ Browser setup complete!\n")
+    
+    async def open_context(self, browser):
+        """Create an authenticated context and page on an already running browser"""
+        # Create context with cookies + localStorage already in place
         print("🍪 Setting up authentication...")
-        self.context = await self.browser.new_context(
+        storage_state = load_storage_state(COOKIES, LOCAL_STORAGE)
+        self.context = await browser.new_context(
             viewport={'width': 1920, 'height': 1080},
-            user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+            user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+            storage_state=storage_state,
+            **har_mode.record_options(self.record_har)
         )
+        print(f"   ✓ Loaded {len(storage_state['cookies'])} cookies, "
+              f"{sum(len(o['localStorage']) for o in storage_state['origins'])} localStorage items")
+        
+        # Offline run: answer requests from the recorded HAR (before the blocker's route)
+        if self.replay_har:
+            await har_mode.replay(self.context, self.replay_har)
+            print(f"   📼 Replaying traffic from {self.replay_har}")
+        elif self.record_har:
+            print(f"   📼 Recording traffic to {self.record_har}")
         
-        # Add cookies
-        await self.context.add_cookies(COOKIES)
-        print(f"   ✓ Added {len(COOKIES)} cookies")
+        # Skip images, fonts and trackers
+        if self.blocker:
+            await self.blocker.install(self.context)
         
         # Create page
         self.page = await self.context.new_page()
+        if self.capture:
+            self.capture.attach(self.page)
         
-        # Set localStorage if provided
-        if LOCAL_STORAGE:
-            print(f"   ✓ Setting {len(LOCAL_STORAGE)} localStorage items...")
-            await self.page.goto('https://app.muraena.ai')
-            for key, value in LOCAL_STORAGE.items():
-                await self.page.evaluate(f'localStorage.setItem("{key}", {json.dumps(value)})')
-        
-        print("✅ Browser setup complete!\n")
+        return self.context, self.page
+    
+    async def check_session(self, url=None):
+        """Cheap session probe before the real navigation"""
+        if self.replay_har:
+            # The probe would go to the live site
+            return True
+        print("🔑 Checking session...")
+        ok, reason = await probe_session(self.playwright, url or TARGET_URL, load_storage_state(COOKIES, LOCAL_STORAGE))
+        if not ok:
+            print(f"\n❌ ERROR: Session is stale ({reason})")
+            print(f"\n💡 Solution: Run extract_cookies.py to refresh {STORAGE_STATE_FILE}")
+            return False
+        print(f"   ✓ Session looks valid ({reason})\n")
+        return True
         
-    async def navigate_to_target(self):
+    async def navigate_to_target(self, url=None):
         """Navigate to the target search results page"""
         print(f"🔍 Navigating to target page...")
         
+        self.last_status = None
+        self.last_failure = None
+        self.current_url = url or TARGET_URL
+        self.sampled = self.screenshots.next_page()
         try:
-            response = await self.page.goto(TARGET_URL, wait_until='networkidle', timeout=TIMEOUT)
+            if self.capture:
+                self.capture.reset()
+            response = await self.page.goto(url or TARGET_URL, wait_until='domcontentloaded', timeout=TIMEOUT)
+            self.last_status = response.status
             print(f"   Status: {response.status}")
             
+            # In network mode the API payload is all we need - don't wait for rendering
+            if not self.capture:
+                ready = await wait_until_ready(self.page)
+                state = 'timed out' if ready['timedOut'] else 'ready'
+                print(f"   Page {state}: {ready['rows']} rows after {ready['elapsedMs']} ms")
+            
             # Check if we're logged in
             current_url = self.page.url
             print(f"   Current URL: {current_url}")
             
             if 'login' in current_url or 'signin' in current_url:
+                self.last_failure = 'login'
                 print("\n❌ ERROR: Redirected to login page!")
                 print("   Your session may have expired or localStorage tokens are needed.")
                 print("\n💡 Solution: Run extract_storage.html to get localStorage tokens")
+                await self.screenshot('01_login_redirect', error=True)
                 return False
             
             print("✅ Successfully authenticated!\n")
             
-            # Take screenshot
-            await self.page.screenshot(path='screenshots/01_authenticated.png', full_page=True)
-            print("   📸 Screenshot saved: screenshots/01_authenticated.png\n")
+            await self.screenshot('01_authenticated')
             
             return True
             
         except Exception as e:
+            self.last_failure = 'timeout' if 'Timeout' in type(e).__name__ else 'error'
             print(f"❌ Navigation error: {e}")
             return False
     
+    async def screenshot(self, name, error=False):
+        """Take a screenshot if the screenshot policy wants this one"""
+        path = await self.screenshots.capture(self.page, self.shot_prefix + name, self.sampled, error)
+        if path:
+            print(f"   📸 Screenshot saved: {path}\n")
+    
+    def load_cached(self, url=None):
+        """Records of a page from the response cache, or None on a miss"""
+        if not self.cache:
+            return None
+        entry = self.cache.get(url or TARGET_URL)
+        if not entry:
+            return None
+        self.results = records_from_entry(entry)
+        print(f"🗄️  Loaded {len(self.results)} records from cache ({entry['kind']} payload)\n")
+        return self.results
+    
+    def cache_page(self, kind, payload):
+        """Store the payload of the page we navigated to"""
+        if self.cache and self.current_url:
+            self.cache.put(self.current_url, kind, payload)
+    
     async def wait_for_table(self):
         """Wait for the results table to load"""
         print("⏳ Waiting for results table...")
         
+        # Known layout: one cheap query instead of discovery
+        layout, count = await layout_cache.check(self.page, 'table')
+        if layout and count:
+            self.columns = layout.get('columns', self.columns)
+            self.reveal_selector = layout.get('reveal_selector')
+            print(f"   ⚡ Cached layout: {count} rows using selector: {layout['row_selector']}\n")
+            return layout['row_selector']
+        
         table_selectors = [
             'table tbody tr',
             '.ant-table-tbody tr',
             '[class*="Table"] tbody tr',
             'tbody tr'
         ]
+        if layout:
+            # Rows not rendered yet: give the cached selector first preference in the race
+            table_selectors = [layout['row_selector']] + [s for s in table_selectors if s != layout['row_selector']]
         
-        for selector in table_selectors:
-            try:
-                await self.page.wait_for_selector(selector, timeout=10000)
-                count = await self.page.locator(selector).count()
-                print(f"   ✓ Found {count} rows using selector: {selector}\n")
-                return selector
-            except:
-                continue
+        # Wait on all candidates at once instead of 10 s per miss
+        selector, count = await race_selectors(self.page, table_selectors, timeout=10000, group='table_rows')
+        layout = layout_cache.confirm(self.page.url, 'table', selector)
+        if layout:
+            self.columns = layout.get('columns', self.columns)
+            self.reveal_selector = layout.get('reveal_selector')
+            print(f"   ⚡ Cached layout: {count} rows using selector: {selector}\n")
+            return selector
+        if selector:
+            print(f"   ✓ Found {count} rows using selector: {selector}\n")
+            self.columns = await discover_columns(self.page, selector)
+            layout_cache.update(self.page.url, 'table', row_selector=selector, columns=self.columns)
+            return selector
         
         print("❌ No table found!")
-        await self.page.screenshot(path='screenshots/02_no_table_error.png', full_page=True)
-        print("   📸 Screenshot saved: screenshots/02_no_table_error.png\n")
+        await self.screenshot('02_no_table_error', error=True)
         return None
     
     async def click_reveal_buttons(self):
         """Click all 'Reveal' buttons to uncover hidden data"""
         print("🔓 Looking for 'Reveal' buttons...")
         
-        await self.page.screenshot(path='screenshots/03_before_reveal.png', full_page=True)
+        await self.screenshot('03_before_reveal')
         
         # Try different button selectors
         reveal_selectors = [
@@ -211,9 +321,28 @@ class MuraenaScraper:
             'button[class*="show"]'
         ]
         
+        # Try the cached reveal selector alone first
+        total_clicked, used_selector = 0, None
+        if self.reveal_selector:
+            total_clicked, used_selector = await self.click_buttons([self.reveal_selector])
+        if total_clicked == 0:
+            total_clicked, used_selector = await self.click_buttons(reveal_selectors)
+        
+        if total_clicked > 0:
+            self.reveal_selector = used_selector
+            layout_cache.update(self.page.url, 'table', reveal_selector=used_selector)
+            print(f"   ✓ Clicked {total_clicked} reveal buttons")
+            await wait_until_ready(self.page)  # Wait for revealed data to settle
+            await self.screenshot('04_after_reveal')
+        else:
+            print("   ℹ️  No reveal buttons found - data may already be visible\n")
+    
+    async def click_buttons(self, selectors):
+        """Click every button matching selectors, return (clicks, first selector that clicked)"""
         total_clicked = 0
+        used_selector = None
         
-        for selector in reveal_selectors:
+        for selector in selectors:
             try:
                 buttons = await self.page.locator(selector).all()
                 
@@ -224,68 +353,27 @@ class MuraenaScraper:
                         try:
                             await button.click(timeout=500)
                             total_clicked += 1
+                            used_selector = used_selector or selector
                             await self.page.wait_for_timeout(200)  # Small delay between clicks
                         except:
                             continue
             except:
                 continue
         
-        if total_clicked > 0:
-            print(f"   ✓ Clicked {total_clicked} reveal buttons")
-            await self.page.wait_for_timeout(2000)  # Wait for data to load
-            await self.page.screenshot(path='screenshots/04_after_reveal.png', full_page=True)
-            print("   📸 Screenshot saved: screenshots/04_after_reveal.png\n")
-        else:
-            print("   ℹ️  No reveal buttons found - data may already be visible\n")
+        return total_clicked, used_selector
     
     async def extract_table_data(self, row_selector):
         """Extract data from the table"""
         print("📊 Extracting data from table...")
         
-        # JavaScript to extract table data
-        results = await self.page.evaluate(f"""
-            (rowSelector) => {{
-                const rows = document.querySelectorAll(rowSelector);
-                const data = [];
-                
-                rows.forEach((row, idx) => {{
-                    const cells = row.querySelectorAll('td');
-                    if (cells.length === 0) return;
-                    
-                    const getCellData = (cell) => {{
-                        if (!cell) return {{ text: '', link: '', hasButton: false }};
-                        
-                        const link = cell.querySelector('a');
-                        const button = cell.querySelector('button');
-                        const text = cell.innerText?.trim() || '';
-                        
-                        return {{
-                            text: text,
-                            link: link ? link.href : '',
-                            hasButton: !!button
-                        }};
-                    }};
-                    
-                    const rowData = {{
-                        rowNumber: idx + 1,
-                        companyName: getCellData(cells[0]),
-                        website: getCellData(cells[1]),
-                        industry: getCellData(cells[2]),
-                        location: getCellData(cells[3]),
-                        headcount: getCellData(cells[4]),
-                        email: getCellData(cells[5]),
-                        phone: getCellData(cells[6]),
-                        role: getCellData(cells[7]),
-                        additional: getCellData(cells[8]),
-                        cellCount: cells.length
-                    }};
-                    
-                    data.push(rowData);
-                }});
-                
-                return data;
-            }}
-        """, row_selector)
+        # Column arrays + button bitsets keep the protocol payload small;
+        # records are only built when a row is accessed
+        payload = await self.page.evaluate(
+            COLUMNAR_EXTRACT_JS, {'rowSelector': row_selector, 'columns': self.columns}
+        )
+        results = ColumnarRows(payload)
+        if results:
+            self.cache_page('dom', payload)
         
         self.results = results
         print(f"   ✓ Extracted {len(results)} records\n")
@@ -300,78 +388,102 @@ class MuraenaScraper:
         
         return results
     
+    async def extract_network_data(self):
+        """Build records from the captured search API response instead of the DOM"""
+        print("📡 Waiting for search API response...")
+        
+        payload = await self.capture.wait_for_payload(timeout=TIMEOUT)
+        if payload is None:
+            print("   ⚠️  No search API response captured\n")
+            return []
+        
+        self.results = self.capture.to_records(payload)
+        self.cache_page('network', payload)
+        print(f"   ✓ Extracted {len(self.results)} records from API response\n")
+        return self.results
+    
     def save_results(self):
-        """Save results to JSON and CSV files"""
+        """Stream results to NDJSON, then export JSON and CSV from it"""
         print("💾 Saving results...")
         
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         
-        # Save to JSON
+        # Append-only NDJSON first, so nothing is lost if an export fails
+        ndjson_file = f'muraena_results_{timestamp}.ndjson'
+        with NdjsonSink(ndjson_file) as sink:
+            sink.write_many(self.results)
+        print(f"   ✓ NDJSON saved: {ndjson_file}")
+        
+        # Legacy JSON array
         json_file = f'muraena_results_{timestamp}.json'
-        with open(json_file, 'w', encoding='utf-8') as f:
-            json.dump(self.results, f, indent=2, ensure_ascii=False)
+        export_json(ndjson_file, json_file)
         print(f"   ✓ JSON saved: {json_file}")
         
-        # Save to CSV
+        # CSV
         csv_file = f'muraena_results_{timestamp}.csv'
         if self.results:
-            with open(csv_file, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                
-                # Header
-                writer.writerow([
-                    'Row', 'Company Name', 'Website', 'Industry', 'Location',
-                    'Headcount', 'Email', 'Phone', 'Role', 'Company Link', 'Website Link'
-                ])
-                
-                # Data
-                for row in self.results:
-                    writer.writerow([
-                        row['rowNumber'],
-                        row['companyName']['text'],
-                        row['website']['text'],
-                        row['industry']['text'],
-                        row['location']['text'],
-                        row['headcount']['text'],
-                        row['email']['text'],
-                        row['phone']['text'],
-                        row['role']['text'],
-                        row['companyName']['link'],
-                        row['website']['link']
-                    ])
-            
+            export_csv(ndjson_file, csv_file)
             print(f"   ✓ CSV saved: {csv_file}\n")
         
         return json_file, csv_file
     
     async def cleanup(self):
         """Close browser and cleanup"""
+        await self.screenshots.flush()
+        if self.blocker:
+            self.blocker.print_summary()
+        if self.cache:
+            self.cache.print_summary()
+        if self.context and (self.endpoint or self.record_har):
+            # Attached to a shared browser: only drop our own context.
+            # Recording: the HAR is written when the context closes.
+            await self.context.close()
         if self.browser:
             await self.browser.close()
+        if self.playwright:
+            await self.playwright.stop()
         print("🧹 Cleanup complete")
     
     async def run(self):
         """Main scraping workflow"""
         try:
+            # A fresh cached copy needs neither a browser nor the network
+            if self.load_cached() is not None:
+                self.save_results()
+                print("✅ Served from cache (use --refresh to fetch again)")
+                print(f"📊 Total records extracted: {len(self.results)}")
+                await self.cleanup()
+                return True
+            
             # Setup
             await self.setup()
             
-            # Navigate
-            if not await self.navigate_to_target():
+            # Catch stale sessions before the heavy page load
+            if not await self.check_session():
                 await self.cleanup()
                 return False
             
-            # Wait for table
-            row_selector = await self.wait_for_table()
-            if not row_selector:
+            # Navigate
+            if not await self.navigate_to_target():
                 await self.cleanup()
                 return False
             
-            # Click reveal buttons
-            await self.click_reveal_buttons()
+            # Network mode: read the API payload, fall back to the DOM if none arrived
+            if self.capture:
+                await self.extract_network_data()
             
-            # Extract data
-            await self.extract_table_data(row_selector)
+            if not self.results:
+                # Wait for table
+                row_selector = await self.wait_for_table()
+                if not row_selector:
+                    await self.cleanup()
+                    return False
+                
+                # Click reveal buttons
+                await self.click_reveal_buttons()
+                
+                # Extract data
+                await self.extract_table_data(row_selector)
             
             # Save results
             if self.results:
@@ -395,8 +507,26 @@ class MuraenaScraper:
             return False
 
 
+def parse_args():
+    parser = argparse.ArgumentParser(description='Scrape one Muraena.ai search results page')
+    parser.add_argument('--connect', nargs='?', const='', default=None, metavar='ENDPOINT',
+                        help='Attach to a running browser_server.py instead of launching Chromium')
+    parser.add_argument('--cache', action='store_true', default=CACHE,
+                        help='Serve the page from the on-disk cache when fresh, store it otherwise')
+    parser.add_argument('--refresh', action='store_true',
+                        help='Ignore cached pages but store the newly fetched one (implies --cache)')
+    har_mode.add_har_arguments(parser)
+    args = parser.parse_args()
+    
+    if args.connect == '':
+        args.connect = default_endpoint()
+    return args
+
+
 async def main():
     """Entry point"""
+    args = parse_args()
+    
     # Create screenshots directory
     os.makedirs('screenshots', exist_ok=True)
     
@@ -405,14 +535,16 @@ async def main():
     print("=" * 60)
     print()
     
-    scraper = MuraenaScraper()
+    cache = ResponseCache(refresh=args.refresh) if args.cache or args.refresh else None
+    scraper = MuraenaScraper(endpoint=args.connect, cache=cache,
+                             record_har=args.record_har, replay_har=args.replay_har)
     success = await scraper.run()
     
     if not success:
         print("\n💡 Troubleshooting:")
         print("1. Check screenshots/ folder for debugging")
-        print("2. If you see 'Not authenticated', run extract_storage.html")
-        print("3. Add localStorage tokens to LOCAL_STORAGE in this script")
+        print("2. If you see 'Not authenticated', run extract_cookies.py to refresh storage_state.json")
+        print("3. Or add localStorage tokens to LOCAL_STORAGE in this script")
         print("4. Make sure TARGET_URL is correct in .env")
 
 
@@ -0,0 +1,686 @@
+"""
+Muraena.ai Multi-Page Scraper - Bulk scraping for production use
+
+This script scrapes a whole range of search result pages in one run.
+It launches ONE Chromium and runs a bounded pool of browser contexts that
+pull page numbers from a shared queue, so N workers finish a page range in
+roughly 1/N of the time of N sequential single-page runs. How many of them
+fetch at once is adjusted on the fly by an AIMD controller (see
+adaptive_concurrency.py), with --concurrency as the ceiling. Scraped pages
+flow through bounded queues to a normalizer and a writer stage, so building
+records and writing files never stall the browser workers.
+
+With --api only the first page is loaded in the browser. The search API
+request it triggers is captured and replayed over a pooled HTTP client for
+every other page (see api_replay.py), falling back to the browser if the
+request cannot be paginated.
+
+With --processes N the pending pages are dealt out to N worker processes,
+each with its own browser and worker pool. Workers build and serialize their
+records themselves and ship NDJSON lines back to the parent, which is the
+single writer (dedup, NDJSON sink, checkpoint), so JSON decoding and record
+building use every core instead of one event loop.
+
+Features:
+- Reuses the cookie/localStorage setup from muraena_scraper_local.py
+- Concurrent page workers (one browser context each), adaptive parallelism
+- Deduplicates entries across pages
+- Checkpoints every page; --resume skips finished pages after a crash
+- Exports to JSON + CSV + Excel
+
+Requirements:
+    pip install playwright pandas openpyxl
+    playwright install chromium
+
+Usage:
+    python muraena_scraper_multipage.py --start-page 1 --end-page 10
+    python muraena_scraper_multipage.py --pages 5 --concurrency 3
+    python muraena_scraper_multipage.py --pages 50 --concurrency 8 --max-rps 1
+    python muraena_scraper_multipage.py --pages 5 --connect   # attach to browser_server.py
+    python muraena_scraper_multipage.py --pages 50 --resume   # continue an interrupted run
+    python muraena_scraper_multipage.py --pages 200 --processes 8 --concurrency 4
+    python muraena_scraper_multipage.py --pages 500 --api --concurrency 8 --max-rps 5
+    python muraena_scraper_multipage.py --pages 20 --cache    # fresh pages come from .cache/
+    python muraena_scraper_multipage.py --pages 3 --record-har hars/pages.har   # then --replay-har
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import queue as queue_module
+import time
+from datetime import datetime
+from playwright.async_api import async_playwright
+from dotenv import load_dotenv
+
+# Load environment variables first: the modules below read their settings on import
+load_dotenv()
+
+from muraena_scraper_local import MuraenaScraper, HEADLESS, TIMEOUT, COOKIES, LOCAL_STORAGE
+from network_capture import SearchResponseCapture, payload_to_records
+from api_replay import SearchApiReplay
+from response_cache import ResponseCache, records_from_entry, CACHE
+import har_mode
+from screenshot_policy import ScreenshotPolicy
+from request_blocker import RequestBlocker, BLOCK_REQUESTS
+from browser_server import launch_or_connect, default_endpoint
+from columnar_rows import ColumnarRows
+from result_sink import NdjsonSink, iter_records, ndjson_line, export_json, export_csv, csv_row, CSV_HEADER
+from checkpoint import CrawlCheckpoint
+from pagination import build_page_url, shard_pages
+from adaptive_concurrency import AdaptiveLimiter, MIN_CONCURRENCY, MAX_RPS
+from session_state import load_storage_state, probe_session, STORAGE_STATE_FILE
+
+# Configuration
+BASE_URL = os.getenv('BASE_URL', os.getenv('TARGET_URL', 'https://app.muraena.ai/companies_search/results'))
+PAGE_SIZE = int(os.getenv('PAGE_SIZE', '100'))
+# Ceiling for the adaptive controller (or the fixed pool size with --fixed)
+CONCURRENCY = int(os.getenv('CONCURRENCY', '4'))
+# Worker processes (each with its own browser); 1 = everything in this process
+PROCESSES = int(os.getenv('PROCESSES', '1'))
+# Pages that may wait between the browser workers, the normalizer and the writer
+PIPELINE_DEPTH = int(os.getenv('PIPELINE_DEPTH', '8'))
+# Replay the search API over HTTP after the first page instead of loading every page
+API_FAST_PATH = os.getenv('API_FAST_PATH', 'false').lower() == 'true'
+
+
+def record_key(record):
+    """Dedup key of a record: company link, else company name"""
+    return record['companyName']['link'] or record['companyName']['text']
+
+
+def make_limiter(concurrency, fixed, max_rps):
+    return AdaptiveLimiter(
+        initial=concurrency if fixed else MIN_CONCURRENCY,
+        min_limit=concurrency if fixed else MIN_CONCURRENCY,
+        max_limit=concurrency,
+        max_rps=max_rps,
+    )
+
+
+class MuraenaMultiPageScraper:
+    def __init__(self, start_page, end_page, concurrency=CONCURRENCY, endpoint=None, resume=False,
+                 fixed=False, max_rps=MAX_RPS, processes=PROCESSES, api=API_FAST_PATH,
+                 cache=CACHE, refresh=False, record_har=None, replay_har=None):
+        self.playwright = None
+        self.endpoint = endpoint
+        self.browser = None
+        self.start_page = start_page
+        self.end_page = end_page
+        self.record_har = record_har
+        self.replay_har = replay_har
+        if record_har:
+            # One context records into one HAR file
+            concurrency, processes, fixed = 1, 1, True
+        if (record_har or replay_har) and api:
+            # The HTTP fast path bypasses the browser context, so it can't be recorded or replayed
+            print("ℹ️  --api is ignored with --record-har/--replay-har")
+            api = False
+        self.concurrency = max(1, min(concurrency, end_page - start_page + 1))
+        self.fixed = fixed
+        self.max_rps = max_rps
+        self.api = api
+        self.replay = None
+        self.cache = ResponseCache(refresh=refresh) if cache or refresh else None
+        self.limiter = make_limiter(self.concurrency, fixed, max_rps)
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        self.checkpoint = CrawlCheckpoint.open(
+            BASE_URL, PAGE_SIZE, timestamp, f'muraena_results_{timestamp}.ndjson', resume
+        )
+        # On resume these come from the checkpoint, so output files keep their names
+        self.timestamp = self.checkpoint.timestamp
+        self.ndjson_file = self.checkpoint.ndjson_file
+        self.resume = resume
+        self.pending_pages = self.checkpoint.pending(range(start_page, end_page + 1))
+        self.processes = max(1, min(processes, len(self.pending_pages)))
+        self.sink = None
+        self.total_records = 0
+        self.failed_pages = []
+        self.seen = set()
+        # One blocker shared by all workers so the savings add up in one place
+        self.blocker = RequestBlocker() if BLOCK_REQUESTS else None
+        # Shared too, so 'sampled' counts pages across all workers
+        self.screenshots = ScreenshotPolicy()
+
+    async def setup(self):
+        """Launch the shared browser"""
+        print("🚀 Starting Muraena.ai Multi-Page Scraper...")
+        print(f"📍 Base URL: {BASE_URL}")
+        print(f"📄 Pages: {self.start_page}-{self.end_page} ({PAGE_SIZE} per page)")
+        if self.resume:
+            skipped = self.end_page - self.start_page + 1 - len(self.pending_pages)
+            print(f"♻️  Resuming: {skipped} pages already done, {len(self.pending_pages)} to go")
+        if self.processes > 1:
+            print(f"🧩 Processes: {self.processes} (one browser each)")
+        print(f"🧵 Workers: {self.limiter.limit}-{self.concurrency} "
+              f"({'fixed' if self.limiter.min_limit == self.concurrency else 'adaptive'})"
+              f"{' per process' if self.processes > 1 else ''}, "
+              f"max {self.limiter.max_rps or 'unlimited'} req/s")
+        print(f"👁️  Headless mode: {HEADLESS}")
+        print(f"📝 Streaming records to: {self.ndjson_file}")
+        print()
+
+        if self.resume:
+            self.restore_results()
+        self.sink = NdjsonSink(self.ndjson_file)
+        print(f"🔖 Checkpoint: {self.checkpoint.path}")
+
+        self.playwright = await async_playwright().start()
+
+        # In process mode every shard launches its own browser
+        if self.processes == 1:
+            self.browser = await launch_or_connect(self.playwright, self.endpoint, HEADLESS)
+            print("✅ Browser ready!\n")
+
+    async def scrape_page(self, scraper, page_number):
+        """Scrape a single results page with an already authenticated worker"""
+        url = build_page_url(BASE_URL, page_number, PAGE_SIZE)
+        scraper.shot_prefix = f'page{page_number:03d}_'
+
+        if not await scraper.navigate_to_target(url):
+            return None
+
+        records = await scraper.extract_network_data() if scraper.capture else []
+        if records:
+            return self.tag_page(records, page_number)
+
+        row_selector = await scraper.wait_for_table()
+        if not row_selector:
+            # A failure, not an empty page: --resume must retry it (slow render, login redirect)
+            scraper.last_failure = scraper.last_failure or 'no_table'
+            return None
+
+        await scraper.click_reveal_buttons()
+        records = await scraper.extract_table_data(row_selector)
+        return self.tag_page(records, page_number)
+
+    def restore_results(self):
+        """Drop records written after the last checkpoint and reload the dedup keys"""
+        if not os.path.exists(self.ndjson_file):
+            return
+        offset = self.checkpoint.restore_output()
+        for record in iter_records(self.ndjson_file):
+            key = record_key(record)
+            if key:
+                self.seen.add(key)
+            self.total_records += 1
+        print(f"   ✓ Restored {self.total_records} records ({offset} bytes) from {self.ndjson_file}")
+
+    def tag_page(self, records, page_number):
+        if isinstance(records, ColumnarRows):
+            records.extra['page'] = page_number
+            return records
+        for record in records:
+            record['page'] = page_number
+        return records
+
+    def add_lines(self, keyed_lines):
+        """Append a page's (key, NDJSON line) pairs to the sink, dropping duplicates"""
+        new_lines = []
+        for key, line in keyed_lines:
+            if not key or key in self.seen:
+                continue
+            self.seen.add(key)
+            new_lines.append(line)
+        added = self.sink.write_lines(new_lines)
+        self.total_records += added
+        return added
+
+    def commit_page(self, page_number, keyed_lines):
+        """Write a page's lines and checkpoint it; returns the number of new records"""
+        added = self.add_lines(keyed_lines)
+        self.checkpoint.mark_done(page_number, added, self.sink.offset)
+        return added
+
+    def page_failed(self, label, page_number, error):
+        self.failed_pages.append(page_number)
+        self.checkpoint.mark_failed(page_number, error)
+
+    async def normalizer(self, raw, out):
+        """Pipeline stage 2: expand raw page payloads into (key, NDJSON line) pairs"""
+        while True:
+            item = await raw.get()
+            if item is None:
+                await out.put(None)
+                return
+            label, page_number, records, elapsed, error = item
+            if records is not None:
+                records = (len(records), [(record_key(record), ndjson_line(record)) for record in records])
+            await out.put((label, page_number, records, elapsed, error))
+
+    async def writer(self, out):
+        """Pipeline stage 3: persist pages without blocking the browser workers"""
+        while True:
+            item = await out.get()
+            if item is None:
+                return
+            label, page_number, records, elapsed, error = item
+            if records is None:
+                await self.persist_failure(label, page_number, error)
+            else:
+                rows, keyed_lines = records
+                await self.persist(label, page_number, rows, keyed_lines, elapsed)
+
+    async def persist(self, label, page_number, rows, keyed_lines, elapsed):
+        added = await asyncio.to_thread(self.commit_page, page_number, keyed_lines)
+        print(f"   ✓ [{label}] Page {page_number}: {rows} rows, {added} new ({elapsed:.1f}s)")
+
+    async def persist_failure(self, label, page_number, error):
+        await asyncio.to_thread(self.page_failed, label, page_number, error)
+
+    def new_scraper(self):
+        """A worker's MuraenaScraper sharing the blocker, cache and HAR settings"""
+        return MuraenaScraper(blocker=self.blocker, cache=self.cache,
+                              record_har=self.record_har, replay_har=self.replay_har,
+                              screenshots=self.screenshots)
+
+    def cached_page(self, page_number):
+        """Records of a page from the response cache, or None on a miss"""
+        if not self.cache:
+            return None
+        entry = self.cache.get(build_page_url(BASE_URL, page_number, PAGE_SIZE))
+        return self.tag_page(records_from_entry(entry), page_number) if entry else None
+
+    async def fetch_browser_page(self, label, scraper, page_number, fetch):
+        """Load a page in the worker's browser context; returns (records, error)"""
+        # Contexts are opened lazily, so workers above the current limit cost nothing
+        if not scraper.context:
+            await scraper.open_context(self.browser)
+        try:
+            records = await self.scrape_page(scraper, page_number)
+        except Exception as e:
+            print(f"❌ [{label}] Page {page_number} failed: {e}")
+            error, records = str(e), None
+            scraper.last_failure = scraper.last_failure or 'error'
+        else:
+            error = None
+            if records is None:
+                error = ('no results table' if scraper.last_failure == 'no_table'
+                         else f"navigation failed ({scraper.last_failure or 'unknown'})")
+        fetch.report(status=scraper.last_status, failure=scraper.last_failure)
+        return records, error
+
+    async def fetch_api_page(self, label, page_number, fetch):
+        """Fetch a page straight from the search API; returns (records, error)"""
+        try:
+            status, payload = await self.replay.fetch(page_number, TIMEOUT)
+        except Exception as e:
+            print(f"❌ [{label}] Page {page_number} failed: {e}")
+            fetch.report(failure='timeout' if 'timeout' in str(e).lower() else 'error')
+            return None, str(e)
+
+        # A redirect or 401/403 from the API means the session expired
+        login = status in (401, 403) or 300 <= status < 400
+        fetch.report(status=status, failure='login' if login else None)
+        if payload is None:
+            print(f"❌ [{label}] Page {page_number} failed: HTTP {status}")
+            return None, f'search API returned HTTP {status}'
+        if self.cache:
+            self.cache.put(build_page_url(BASE_URL, page_number, PAGE_SIZE), 'network', payload)
+        return self.tag_page(payload_to_records(payload), page_number), None
+
+    async def bootstrap_api(self, raw):
+        """Load the first pending page in the browser and learn the search API request from it"""
+        page_number = self.pending_pages[0]
+        scraper = self.new_scraper()
+        scraper.capture = scraper.capture or SearchResponseCapture()
+        try:
+            started = time.monotonic()
+            async with self.limiter.slot() as fetch:
+                records, error = await self.fetch_browser_page('bootstrap', scraper, page_number, fetch)
+            await raw.put(('bootstrap', page_number, records, time.monotonic() - started, error))
+
+            template = scraper.capture.request_template
+            replay = SearchApiReplay(template, page_number, PAGE_SIZE) if template else None
+            if not replay or not replay.can_paginate():
+                print("⚠️  Search API request not captured or not paginated - using the browser for every page")
+                return None
+
+            await replay.start(self.playwright, await scraper.context.storage_state())
+            print(f"⚡ Replaying {template['method']} {template['url'].split('?')[0]} for the remaining pages")
+            return replay
+        finally:
+            if scraper.context:
+                await scraper.context.close()
+
+    async def worker(self, worker_id, queue, raw):
+        """Pipeline stage 1: scrape pages from the queue, one limiter slot per page"""
+        scraper = self.new_scraper()
+        label = f'worker {worker_id}'
+
+        try:
+            while True:
+                try:
+                    page_number = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+
+                started = time.monotonic()
+                # Cache hits skip the browser, the API and the rate limiter
+                records = self.cached_page(page_number)
+                if records is not None:
+                    await raw.put(('cache', page_number, records, time.monotonic() - started, None))
+                    queue.task_done()
+                    continue
+
+                async with self.limiter.slot() as fetch:
+                    if self.replay:
+                        records, error = await self.fetch_api_page(label, page_number, fetch)
+                    else:
+                        records, error = await self.fetch_browser_page(label, scraper, page_number, fetch)
+
+                # Blocks while the later stages are PIPELINE_DEPTH pages behind
+                await raw.put((label, page_number, records, time.monotonic() - started, error))
+                queue.task_done()
+        finally:
+            if scraper.context:
+                await scraper.context.close()
+
+    def save_results(self):
+        """Export the streamed NDJSON to JSON, CSV and Excel files"""
+        print("💾 Saving results...")
+
+        self.sink.close()
+        print(f"   ✓ NDJSON saved: {self.ndjson_file}")
+
+        # Save to JSON
+        json_file = f'muraena_results_{self.timestamp}.json'
+        export_json(self.ndjson_file, json_file)
+        print(f"   ✓ JSON saved: {json_file}")
+
+        # Save to CSV
+        csv_file = f'muraena_results_{self.timestamp}.csv'
+        export_csv(self.ndjson_file, csv_file, header=['Page'] + CSV_HEADER,
+                   row=lambda record: [record.get('page', '')] + csv_row(record))
+        print(f"   ✓ CSV saved: {csv_file}")
+
+        # Save to Excel (optional - needs pandas + openpyxl)
+        xlsx_file = f'muraena_multipage_{self.timestamp}.xlsx'
+        try:
+            import pandas as pd
+            pd.read_csv(csv_file, dtype=str, keep_default_na=False).to_excel(xlsx_file, index=False)
+            print(f"   ✓ Excel saved: {xlsx_file}\n")
+        except ImportError:
+            print("   ℹ️  pandas/openpyxl not installed - skipping Excel export\n")
+            xlsx_file = None
+
+        return json_file, csv_file, xlsx_file
+
+    async def cleanup(self):
+        """Close browser and cleanup"""
+        await self.screenshots.flush()
+        if self.sink:
+            self.sink.close()
+        if self.blocker:
+            self.blocker.print_summary()
+        if self.cache:
+            self.cache.print_summary()
+        if self.browser:
+            await self.browser.close()
+        if self.playwright:
+            await self.playwright.stop()
+        print("🧹 Cleanup complete")
+
+    async def run_workers(self):
+        """
+        Scrape the pending pages with a pool of contexts on this process's browser.
+
+        Browser workers, the normalizer and the writer run as a pipeline over
+        bounded queues, so expanding and writing one page overlaps with
+        scraping the next ones and at most PIPELINE_DEPTH pages wait in memory.
+        """
+        raw = asyncio.Queue(maxsize=PIPELINE_DEPTH)
+        out = asyncio.Queue(maxsize=PIPELINE_DEPTH)
+        stages = asyncio.gather(self.normalizer(raw, out), self.writer(out))
+
+        pages = list(self.pending_pages)
+        if self.api and pages:
+            self.replay = await self.bootstrap_api(raw)
+            pages = pages[1:]
+
+        queue = asyncio.Queue()
+        for page_number in pages:
+            queue.put_nowait(page_number)
+
+        workers = asyncio.gather(*(
+            self.worker(worker_id + 1, queue, raw)
+            for worker_id in range(min(self.concurrency, max(1, len(self.pending_pages))))
+        ))
+
+        # The stages only finish early if they crashed - don't leave workers blocked on a full queue
+        await asyncio.wait([workers, stages], return_when=asyncio.FIRST_COMPLETED)
+        if stages.done():
+            workers.cancel()
+            await asyncio.gather(workers, return_exceptions=True)
+            await stages
+        await workers
+        await raw.put(None)
+        await stages
+        self.limiter.print_summary()
+
+        if self.replay:
+            print(f"⚡ Search API: {self.replay.requests} requests replayed without the browser")
+            await self.replay.close()
+
+    def run_processes(self):
+        """Fan the pending pages out to shard processes and write what they send back"""
+        ctx = multiprocessing.get_context('spawn')
+        # Bounded, so a slow disk pushes back on the shards instead of buffering pages in memory
+        results = ctx.Queue(maxsize=self.processes * 4)
+        shards = shard_pages(self.pending_pages, self.processes)
+        options = {
+            'concurrency': self.concurrency,
+            'endpoint': self.endpoint,
+            'fixed': self.fixed,
+            'api': self.api,
+            'cache': self.cache is not None,
+            'refresh': bool(self.cache and self.cache.refresh),
+            'replay_har': self.replay_har,
+            # The req/s cap is global, so each shard gets its share
+            'max_rps': self.max_rps / len(shards) if self.max_rps else 0,
+        }
+        workers = [
+            ctx.Process(target=run_shard, args=(shard_id + 1, pages, results, options), daemon=True)
+            for shard_id, pages in enumerate(shards)
+        ]
+        for worker in workers:
+            worker.start()
+
+        running = len(workers)
+        while running:
+            try:
+                message = results.get(timeout=1)
+            except queue_module.Empty:
+                if not any(worker.is_alive() for worker in workers):
+                    break
+                continue
+
+            kind = message[0]
+            if kind == 'page':
+                _, label, page_number, rows, keyed_lines, elapsed = message
+                added = self.commit_page(page_number, keyed_lines)
+                print(f"   ✓ [{label}] Page {page_number}: {rows} rows, {added} new ({elapsed:.1f}s)")
+            elif kind == 'failed':
+                _, label, page_number, error = message
+                self.page_failed(label, page_number, error)
+            elif kind == 'exit':
+                running -= 1
+
+        for worker in workers:
+            worker.join()
+            if worker.exitcode:
+                print(f"⚠️  Shard process {worker.pid} exited with code {worker.exitcode}")
+
+        # Pages of a crashed shard never reported back: count them as failed
+        reported = set(self.failed_pages) | {p for p in self.pending_pages if self.checkpoint.is_done(p)}
+        for page_number in self.pending_pages:
+            if page_number not in reported:
+                self.page_failed('writer', page_number, 'shard process died')
+
+    async def run(self):
+        """Main scraping workflow"""
+        try:
+            await self.setup()
+
+            # Catch stale sessions once, before any worker loads a page (not needed offline)
+            ok, reason = (True, 'offline') if self.replay_har else await probe_session(
+                self.playwright, build_page_url(BASE_URL, self.start_page, PAGE_SIZE), load_storage_state(COOKIES, LOCAL_STORAGE)
+            )
+            if not ok:
+                print(f"❌ ERROR: Session is stale ({reason})")
+                print(f"💡 Solution: Run extract_cookies.py to refresh {STORAGE_STATE_FILE}")
+                await self.cleanup()
+                return False
+
+            started = time.monotonic()
+            if self.processes > 1:
+                await asyncio.to_thread(self.run_processes)
+            else:
+                await self.run_workers()
+            elapsed = time.monotonic() - started
+
+            total_pages = len(self.pending_pages)
+            print(f"\n⏱️  Scraped {total_pages - len(self.failed_pages)}/{total_pages} pages in {elapsed:.1f}s")
+            if self.failed_pages:
+                print(f"⚠️  Failed pages: {sorted(self.failed_pages)}")
+                print("💡 Re-run with --resume to retry only the failed pages")
+
+            if self.total_records:
+                self.save_results()
+                print("✅ Scraping completed successfully!")
+                print(f"📊 Total unique records extracted: {self.total_records}")
+            else:
+                print("⚠️  No data extracted")
+
+            await self.cleanup()
+
+            return not self.failed_pages
+
+        except Exception as e:
+            print(f"\n❌ Error during scraping: {e}")
+            import traceback
+            traceback.print_exc()
+
+            await self.cleanup()
+            return False
+
+
+class ShardScraper(MuraenaMultiPageScraper):
+    """One shard of a --processes run: scrapes its pages and ships records to the writer"""
+
+    def __init__(self, shard_id, pages, results, concurrency, endpoint=None, fixed=False, max_rps=MAX_RPS,
+                 api=API_FAST_PATH, cache=CACHE, refresh=False, replay_har=None):
+        # No sink or checkpoint here - the writer process owns both
+        self.playwright = None
+        self.endpoint = endpoint
+        self.browser = None
+        self.shard_id = shard_id
+        self.results = results
+        self.pending_pages = pages
+        self.concurrency = max(1, min(concurrency, len(pages)))
+        self.limiter = make_limiter(self.concurrency, fixed, max_rps)
+        self.api = api
+        self.replay = None
+        self.cache = ResponseCache(refresh=refresh) if cache or refresh else None
+        self.record_har = None
+        self.replay_har = replay_har
+        self.sink = None
+        self.failed_pages = []
+        self.blocker = RequestBlocker() if BLOCK_REQUESTS else None
+        self.screenshots = ScreenshotPolicy()
+
+    async def setup(self):
+        print(f"🧩 [shard {self.shard_id}] {len(self.pending_pages)} pages, "
+              f"up to {self.concurrency} contexts")
+        self.playwright = await async_playwright().start()
+        self.browser = await launch_or_connect(self.playwright, self.endpoint, HEADLESS)
+
+    async def persist(self, label, page_number, rows, keyed_lines, elapsed):
+        # Records were already serialized by the normalizer, the writer only dedups and appends
+        message = ('page', f'shard {self.shard_id}/{label}', page_number, rows, keyed_lines, elapsed)
+        await asyncio.to_thread(self.results.put, message)
+
+    async def persist_failure(self, label, page_number, error):
+        self.failed_pages.append(page_number)
+        await asyncio.to_thread(self.results.put, ('failed', f'shard {self.shard_id}/{label}', page_number, error))
+
+    async def run(self):
+        try:
+            await self.setup()
+            await self.run_workers()
+        finally:
+            await self.cleanup()
+
+
+def run_shard(shard_id, pages, results, options):
+    """Entry point of a shard process"""
+    try:
+        asyncio.run(ShardScraper(shard_id, pages, results, **options).run())
+    finally:
+        results.put(('exit', shard_id))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Scrape a range of Muraena.ai search result pages')
+    parser.add_argument('--start-page', type=int, default=1, help='First page to scrape (default: 1)')
+    parser.add_argument('--end-page', type=int, help='Last page to scrape (inclusive)')
+    parser.add_argument('--pages', type=int, help='Number of pages to scrape from --start-page')
+    parser.add_argument('--concurrency', type=int, default=CONCURRENCY,
+                        help=f'Maximum number of parallel browser contexts (default: {CONCURRENCY})')
+    parser.add_argument('--fixed', action='store_true',
+                        help='Always run --concurrency contexts instead of adapting to the server')
+    parser.add_argument('--max-rps', type=float, default=MAX_RPS,
+                        help=f'Cap on page loads started per second, 0 = no cap (default: {MAX_RPS})')
+    parser.add_argument('--connect', nargs='?', const='', default=None, metavar='ENDPOINT',
+                        help='Attach to a running browser_server.py instead of launching Chromium')
+    parser.add_argument('--processes', type=int, default=PROCESSES,
+                        help=f'Worker processes, each with its own browser (default: {PROCESSES})')
+    parser.add_argument('--api', action='store_true', default=API_FAST_PATH,
+                        help='Load only the first page in the browser and replay the search API for the rest')
+    parser.add_argument('--cache', action='store_true', default=CACHE,
+                        help='Serve fresh pages from the on-disk cache, store the others')
+    parser.add_argument('--refresh', action='store_true',
+                        help='Ignore cached pages but store the newly fetched ones (implies --cache)')
+    parser.add_argument('--resume', action='store_true',
+                        help='Continue the last run for BASE_URL, skipping pages already checkpointed')
+    har_mode.add_har_arguments(parser)
+    args = parser.parse_args()
+
+    if args.connect == '':
+        args.connect = default_endpoint()
+
+    if args.end_page is None:
+        args.end_page = args.start_page + (args.pages or 1) - 1
+    if args.end_page < args.start_page:
+        parser.error('--end-page must be >= --start-page')
+    return args
+
+
+async def main():
+    """Entry point"""
+    args = parse_args()
+
+    # Create screenshots directory
+    os.makedirs('screenshots', exist_ok=True)
+
+    print("=" * 60)
+    print("  MURAENA.AI MULTI-PAGE SCRAPER - Open Source Edition")
+    print("=" * 60)
+    print()
+
+    scraper = MuraenaMultiPageScraper(args.start_page, args.end_page, args.concurrency, args.connect, args.resume,
+                                      args.fixed, args.max_rps, args.processes, args.api,
+                                      args.cache, args.refresh, args.record_har, args.replay_har)
+    success = await scraper.run()
+
+    if not success:
+        print("\n💡 Troubleshooting:")
+        print("1. Check screenshots/ folder for debugging")
+        print("2. Re-run with --resume to retry only the failed pages")
+        print("3. Lower --concurrency or --max-rps if the site starts rejecting requests")
+        print("4. Make sure BASE_URL is correct in .env")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -16,22 +16,34 @@ Requirements:
 
 Usage:
     python muraena_scraper_profile.py
+    python muraena_scraper_profile.py --record-har hars/profile.har
+    python muraena_scraper_profile.py --replay-har hars/profile.har   # offline
 """
 
+import argparse
 import asyncio
-import json
 import os
 from datetime import datetime
 from playwright.async_api import async_playwright
 from dotenv import load_dotenv
-import csv
 
-# Load environment variables
+# Load environment variables first: the modules below read their settings on import
 load_dotenv()
 
+from network_capture import SearchResponseCapture
+from result_sink import NdjsonSink, export_json, export_csv
+from request_blocker import RequestBlocker, BLOCK_REQUESTS
+from page_readiness import wait_until_ready
+from selector_race import race_selectors
+from layout_cache import layout_cache
+import har_mode
+from screenshot_policy import ScreenshotPolicy
+
 # Configuration
 TARGET_URL = os.getenv('TARGET_URL', 'https://app.muraena.ai/companies_search/results')
 TIMEOUT = int(os.getenv('TIMEOUT', '30000'))
+# 'dom' parses the rendered company rows, 'network' reads the search API JSON
+EXTRACT_MODE = os.getenv('EXTRACT_MODE', 'dom').lower()
 
 # Chrome/Edge user data directory
 # Windows default paths:
@@ -43,11 +55,17 @@ USE_CHROME = True  # Set to False to use Edge instead
 
 
 class MuraenaProfileScraper:
-    def __init__(self):
+    def __init__(self, record_har=None, replay_har=None):
         self.browser = None
         self.context = None
         self.page = None
         self.results = []
+        self.capture = SearchResponseCapture() if EXTRACT_MODE == 'network' else None
+        self.blocker = RequestBlocker() if BLOCK_REQUESTS else None
+        self.record_har = record_har
+        self.replay_har = replay_har
+        self.screenshots = ScreenshotPolicy()
+        self.sampled = True
         
     async def setup(self):
         """Initialize browser with existing profile"""
@@ -78,14 +96,29 @@ class MuraenaProfileScraper:
                 channel='chrome' if USE_CHROME else 'msedge',
                 viewport={'width': 1920, 'height': 1080},
                 args=['--no-sandbox', '--disable-blink-features=AutomationControlled'],
-                slow_mo=100  # Slow down operations slightly for stability
+                slow_mo=100,  # Slow down operations slightly for stability
+                **har_mode.record_options(self.record_har)
             )
+
+            # Offline run: answer requests from the recorded HAR (before the blocker's route)
+            if self.replay_har:
+                await har_mode.replay(self.context, self.replay_har)
+                print(f"Replaying traffic from {self.replay_har}")
+            elif self.record_har:
+                print(f"Recording traffic to {self.record_har}")
             
             # Get the first page or create new one
             if len(self.context.pages) > 0:
                 self.page = self.context.pages[0]
             else:
                 self.page = await self.context.new_page()
+
+            if self.capture:
+                self.capture.attach(self.page)
+
+            # Skip images, fonts and trackers
+            if self.blocker:
+                await self.blocker.install(self.context)
             
             print("Browser launched with your profile!\n")
             
@@ -107,10 +140,19 @@ class MuraenaProfileScraper:
     async def navigate_to_target(self):
         """Navigate to the target search results page"""
         print(f"Navigating to target page...")
+        self.sampled = self.screenshots.next_page()
         
         try:
-            response = await self.page.goto(TARGET_URL, wait_until='networkidle', timeout=TIMEOUT)
+            if self.capture:
+                self.capture.reset()
+            response = await self.page.goto(TARGET_URL, wait_until='domcontentloaded', timeout=TIMEOUT)
             print(f"   Status: {response.status}")
+
+            # In network mode the API payload is all we need - don't wait for rendering
+            if not self.capture:
+                ready = await wait_until_ready(self.page)
+                state = 'timed out' if ready['timedOut'] else 'ready'
+                print(f"   Page {state}: {ready['rows']} rows after {ready['elapsedMs']} ms")
             
             # Check if we're logged in
             current_url = self.page.url
@@ -131,10 +173,7 @@ class MuraenaProfileScraper:
 
             print("Successfully authenticated!\n")
 
-            # Take screenshot
-            os.makedirs('screenshots', exist_ok=True)
-            await self.page.screenshot(path='screenshots/01_authenticated.png', full_page=True)
-            print("   Screenshot saved: screenshots/01_authenticated.png\n")
+            await self.screenshot('01_authenticated')
             
             return True
             
@@ -142,6 +181,12 @@ class MuraenaProfileScraper:
             print(f"Navigation error: {e}")
             return False
     
+    async def screenshot(self, name, error=False):
+        """Take a screenshot if the screenshot policy wants this one"""
+        path = await self.screenshots.capture(self.page, name, self.sampled, error)
+        if path:
+            print(f"   Screenshot saved: {path}\n")
+
     async def switch_to_companies_tab(self):
         """Switch to the Companies tab (not People tab)"""
         print("Switching to Companies tab...")
@@ -162,11 +207,9 @@ class MuraenaProfileScraper:
                         print(f"   Found Companies tab: {selector}")
                         await tab.click()
                         print("   Clicked Companies tab")
-                        await self.page.wait_for_timeout(2000)
+                        await wait_until_ready(self.page)
 
-                        # Take screenshot
-                        await self.page.screenshot(path='screenshots/02_companies_tab.png', full_page=True)
-                        print("   Screenshot: screenshots/02_companies_tab.png\n")
+                        await self.screenshot('02_companies_tab')
                         return True
                 except:
                     continue
@@ -182,16 +225,17 @@ class MuraenaProfileScraper:
         """Wait for the company list/cards to load"""
         print("Waiting for company list...")
         
-        # Wait for dynamic content to load
+        # Wait until the rows stop changing and the spinner is gone
         print("   Waiting for page to fully load...")
-        await self.page.wait_for_timeout(5000)
-
-        # Try to wait for loading spinner to disappear
-        try:
-            await self.page.wait_for_selector('.ant-spin', state='hidden', timeout=10000)
-            print("   Loading complete")
-        except:
-            pass
+        ready = await wait_until_ready(self.page)
+        if not ready['timedOut']:
+            print(f"   Loading complete ({ready['elapsedMs']} ms)")
+
+        # Known layout: one cheap query instead of discovery
+        layout, count = await layout_cache.check(self.page, 'cards')
+        if layout and count:
+            print(f"   Cached layout: {count} company items using: {layout['row_selector']}\n")
+            return layout['row_selector']
         
         # Look for company cards/list items (not tables!)
         company_selectors = [
@@ -207,17 +251,20 @@ class MuraenaProfileScraper:
             'div[class*="Result"]',
             'a[href*="/company/"]',
         ]
+        if layout:
+            # Cached selector had no items yet: try it first before giving up on it
+            company_selectors = [layout['row_selector']] + [s for s in company_selectors if s != layout['row_selector']]
         
-        for selector in company_selectors:
-            try:
-                print(f"   Trying selector: {selector}")
-                await self.page.wait_for_selector(selector, timeout=3000)
-                count = await self.page.locator(selector).count()
-                if count > 0:
-                    print(f"   Found {count} company items using: {selector}\n")
-                    return selector
-            except:
-                continue
+        # Wait on all candidates at once instead of 3 s per miss
+        print(f"   Racing {len(company_selectors)} selectors...")
+        selector, count = await race_selectors(self.page, company_selectors, timeout=5000, group='company_rows')
+        if layout_cache.confirm(self.page.url, 'cards', selector if count > 0 else None):
+            print(f"   Cached layout: {count} company items using: {selector}\n")
+            return selector
+        if count > 0:
+            print(f"   Found {count} company items using: {selector}\n")
+            layout_cache.update(self.page.url, 'cards', row_selector=selector)
+            return selector
         
         # If specific selectors don't work, try to find the pattern
         print("\n   Analyzing page structure...")
@@ -248,14 +295,14 @@ class MuraenaProfileScraper:
             return 'a[href*="/company/"]'  # Use company links as selector
 
         print("\nCould not find company list!")
-        await self.page.screenshot(path='screenshots/02_no_companies_error.png', full_page=True)
+        await self.screenshot('02_no_companies_error', error=True)
         return None
     
     async def inspect_dom_for_hidden_data(self):
         """Inspect the DOM to find hidden email/phone data without clicking buttons"""
         print("Inspecting DOM for hidden contact data...")
 
-        await self.page.screenshot(path='screenshots/03_before_reveal.png', full_page=True)
+        await self.screenshot('03_before_reveal')
 
         # Inspect the page HTML to find where email/phone might be hidden
         dom_info = await self.page.evaluate('''() => {
@@ -302,8 +349,7 @@ class MuraenaProfileScraper:
         """Extract data from company cards/list (not a table!)"""
         print("Extracting data from company list...")
         
-        # Take screenshot before extraction
-        await self.page.screenshot(path='screenshots/03_before_extraction.png', full_page=True)
+        await self.screenshot('03_before_extraction')
         
         # Extract data by parsing the row structure properly
         results = await self.page.evaluate(f"""
@@ -451,52 +497,49 @@ class MuraenaProfileScraper:
         
         return self.results
     
+    async def extract_network_data(self):
+        """Build records from the captured search API response instead of the DOM"""
+        print("Waiting for search API response...")
+
+        payload = await self.capture.wait_for_payload(timeout=TIMEOUT)
+        if payload is None:
+            print("   No search API response captured\n")
+            return []
+
+        self.results = self.capture.to_records(payload)
+        print(f"   Extracted {len(self.results)} companies from API response\n")
+        return self.results
+    
     def save_results(self):
-        """Save results to JSON and CSV files"""
+        """Stream results to NDJSON, then export JSON and CSV from it"""
         print("Saving results...")
-        
+
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        
-        # Save to JSON
+
+        # Append-only NDJSON first, so nothing is lost if an export fails
+        ndjson_file = f'muraena_results_{timestamp}.ndjson'
+        with NdjsonSink(ndjson_file) as sink:
+            sink.write_many(self.results)
+        print(f"   NDJSON saved: {ndjson_file}")
+
+        # Legacy JSON array
         json_file = f'muraena_results_{timestamp}.json'
-        with open(json_file, 'w', encoding='utf-8') as f:
-            json.dump(self.results, f, indent=2, ensure_ascii=False)
+        export_json(ndjson_file, json_file)
         print(f"   JSON saved: {json_file}")
-        
-        # Save to CSV
+
+        # CSV
         csv_file = f'muraena_results_{timestamp}.csv'
         if self.results:
-            with open(csv_file, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                
-                # Header
-                writer.writerow([
-                    'Row', 'Company Name', 'Website', 'Industry', 'Location',
-                    'Headcount', 'Email', 'Phone', 'Role', 'Company Link', 'Website Link'
-                ])
-                
-                # Data
-                for row in self.results:
-                    writer.writerow([
-                        row['rowNumber'],
-                        row['companyName']['text'],
-                        row['website']['text'],
-                        row['industry']['text'],
-                        row['location']['text'],
-                        row['headcount']['text'],
-                        row['email']['text'],
-                        row['phone']['text'],
-                        row['role']['text'],
-                        row['companyName']['link'],
-                        row['website']['link']
-                    ])
-
+            export_csv(ndjson_file, csv_file)
             print(f"   CSV saved: {csv_file}\n")
-        
+
         return json_file, csv_file
     
     async def cleanup(self):
         """Close browser and cleanup"""
+        await self.screenshots.flush()
+        if self.blocker:
+            self.blocker.print_summary()
         if self.context:
             await self.context.close()
         print("Cleanup complete")
@@ -512,20 +555,25 @@ class MuraenaProfileScraper:
                 await self.cleanup()
                 return False
             
-            # Switch to Companies tab (important!)
-            await self.switch_to_companies_tab()
-            
-            # Wait for company list
-            company_selector = await self.wait_for_companies()
-            if not company_selector:
-                await self.cleanup()
-                return False
+            # Network mode: read the API payload, fall back to the DOM if none arrived
+            if self.capture:
+                await self.extract_network_data()
+
+            if not self.results:
+                # Switch to Companies tab (important!)
+                await self.switch_to_companies_tab()
+                
+                # Wait for company list
+                company_selector = await self.wait_for_companies()
+                if not company_selector:
+                    await self.cleanup()
+                    return False
 
-            # Inspect DOM for hidden data (instead of clicking buttons that navigate away)
-            await self.inspect_dom_for_hidden_data()
+                # Inspect DOM for hidden data (instead of clicking buttons that navigate away)
+                await self.inspect_dom_for_hidden_data()
 
-            # Extract data
-            await self.extract_company_data(company_selector)
+                # Extract data
+                await self.extract_company_data(company_selector)
             
             # Save results
             if self.results:
@@ -549,14 +597,22 @@ class MuraenaProfileScraper:
             return False
 
 
+def parse_args():
+    parser = argparse.ArgumentParser(description='Scrape Muraena.ai with your existing browser profile')
+    har_mode.add_har_arguments(parser)
+    return parser.parse_args()
+
+
 async def main():
     """Entry point"""
+    args = parse_args()
+
     print("=" * 60)
     print("  MURAENA.AI PROFILE SCRAPER - No Cookie Extraction!")
     print("=" * 60)
     print()
     
-    scraper = MuraenaProfileScraper()
+    scraper = MuraenaProfileScraper(args.record_har, args.replay_har)
     success = await scraper.run()
     
     if not success:
@@ -0,0 +1,168 @@
+"""
+Network-response capture for Muraena.ai search results
+
+The results page is a SPA that downloads the search results as JSON before
+rendering them. Instead of walking the rendered DOM and guessing fields from
+innerText, this module listens with page.on('response') for that XHR/fetch
+payload and turns it directly into records with the same shape the DOM
+extractors produce ({text, link} per field).
+
+Usage:
+    capture = SearchResponseCapture()
+    capture.attach(page)
+    capture.reset()
+    await page.goto(url, wait_until='domcontentloaded')
+    payload = await capture.wait_for_payload(timeout=30000)
+    records = capture.to_records(payload)
+
+The request that produced the last payload is kept in capture.request_template
+({url, method, headers, postData}) so api_replay.py can call the search API
+directly for the following pages.
+"""
+
+import asyncio
+import os
+
+# Substrings that identify the search API in a response URL (comma separated)
+API_URL_PATTERNS = [
+    p.strip() for p in os.getenv('API_URL_PATTERNS', 'search').split(',') if p.strip()
+]
+
+# Keys that usually wrap the list of results in an API payload
+LIST_KEYS = ['data', 'results', 'items', 'companies', 'records', 'rows', 'hits', 'content']
+
+# Candidate payload keys for every output field, in order of preference
+FIELD_ALIASES = {
+    'companyName': ['name', 'company_name', 'companyName', 'title', 'legal_name'],
+    'website': ['website', 'domain', 'website_url', 'url', 'homepage'],
+    'industry': ['industry', 'industries', 'category', 'sector'],
+    'location': ['location', 'address', 'hq_location', 'headquarters', 'city'],
+    'headcount': ['headcount', 'employees', 'employee_count', 'size', 'company_size', 'employees_range'],
+    'email': ['email', 'emails', 'contact_email'],
+    'phone': ['phone', 'phones', 'phone_number', 'contact_phone'],
+    'role': ['role', 'job_title', 'position'],
+}
+
+LINK_ALIASES = ['profile_url', 'link', 'muraena_url', 'company_url']
+
+
+def _flatten(value):
+    """Render a payload value as a single display string"""
+    if value is None:
+        return ''
+    if isinstance(value, (list, tuple)):
+        return ', '.join(s for s in (_flatten(v) for v in value) if s)
+    if isinstance(value, dict):
+        # Common shapes: {"name": ...}, {"city": .., "state": .., "country": ..}
+        if 'name' in value:
+            return _flatten(value['name'])
+        parts = [value.get(k) for k in ('city', 'state', 'region', 'country') if value.get(k)]
+        if parts:
+            return ', '.join(_flatten(p) for p in parts)
+        return ', '.join(s for s in (_flatten(v) for v in value.values()) if s)
+    return str(value).strip()
+
+
+def _pick(item, aliases):
+    for key in aliases:
+        if key in item and item[key] not in (None, '', [], {}):
+            return item[key]
+    return None
+
+
+def find_record_list(payload):
+    """Return the list of result objects inside an API payload, or None"""
+    if isinstance(payload, list):
+        return payload if payload and all(isinstance(i, dict) for i in payload) else None
+    if not isinstance(payload, dict):
+        return None
+
+    for key in LIST_KEYS:
+        if key in payload:
+            found = find_record_list(payload[key])
+            if found:
+                return found
+
+    # Fall back to the largest list of objects anywhere one level down
+    best = None
+    for value in payload.values():
+        found = find_record_list(value) if isinstance(value, (list, dict)) else None
+        if found and (best is None or len(found) > len(best)):
+            best = found
+    return best
+
+
+def item_to_record(item, row_number):
+    """Convert one API result object into a scraper record"""
+    record = {'rowNumber': row_number}
+
+    for field, aliases in FIELD_ALIASES.items():
+        record[field] = {'text': _flatten(_pick(item, aliases)), 'link': ''}
+
+    website = record['website']['text']
+    if website:
+        record['website']['link'] = website if website.startswith('http') else f'https://{website}'
+    record['companyName']['link'] = _flatten(_pick(item, LINK_ALIASES))
+
+    record['source'] = 'network'
+    return record
+
+
+def payload_to_records(payload):
+    """Turn a search API payload into scraper records"""
+    items = find_record_list(payload) or []
+    return [item_to_record(item, idx + 1) for idx, item in enumerate(items)]
+
+
+class SearchResponseCapture:
+    def __init__(self, url_patterns=None):
+        self.url_patterns = url_patterns or API_URL_PATTERNS
+        self.payloads = []
+        self.event = asyncio.Event()
+        self.request_template = None
+
+    def attach(self, page):
+        """Start listening for search API responses on a page"""
+        page.on('response', self.on_response)
+
+    def reset(self):
+        """Forget payloads from the previous navigation"""
+        self.payloads = []
+        self.event = asyncio.Event()
+
+    def matches(self, response):
+        if response.request.resource_type not in ('xhr', 'fetch'):
+            return False
+        if 'json' not in response.headers.get('content-type', ''):
+            return False
+        return any(pattern in response.url for pattern in self.url_patterns)
+
+    async def on_response(self, response):
+        if not self.matches(response):
+            return
+        try:
+            payload = await response.json()
+        except Exception:
+            return
+        if find_record_list(payload):
+            request = response.request
+            self.request_template = {
+                'url': response.url,
+                'method': request.method,
+                'headers': await request.all_headers(),
+                'postData': request.post_data,
+            }
+            self.payloads.append(payload)
+            self.event.set()
+
+    async def wait_for_payload(self, timeout=30000):
+        """Wait for the first search payload, return None on timeout"""
+        try:
+            await asyncio.wait_for(self.event.wait(), timeout / 1000)
+        except asyncio.TimeoutError:
+            return None
+        return self.payloads[-1]
+
+    def to_records(self, payload):
+        """Turn a captured payload into scraper records"""
+        return payload_to_records(payload)
@@ -0,0 +1,109 @@
+"""
+Event-driven page readiness for Muraena.ai results pages
+
+Instead of waiting for 'networkidle' and then sleeping for a fixed number of
+seconds, the page is considered ready as soon as:
+    - at least one result row exists,
+    - the row count and the DOM have not changed for QUIET_MS, and
+    - no .ant-spin spinner is visible.
+
+A MutationObserver tracks DOM changes in the page itself, so the check costs a
+single page.evaluate round trip. READY_TIMEOUT is the hard ceiling - the wait
+never takes longer than that, even if the page keeps changing.
+
+READINESS_JS is plain JavaScript so the Apify pageFunction can embed it too.
+"""
+
+import json
+import os
+
+QUIET_MS = int(os.getenv('QUIET_MS', '500'))
+READY_TIMEOUT = int(os.getenv('READY_TIMEOUT', '15000'))
+
+# Rows of either layout: the ant-design table or the company cards
+DEFAULT_ROW_SELECTOR = 'tbody tr, [class*="CompanyRow"], [class*="CompanyCard"]'
+SPINNER_SELECTOR = '.ant-spin-spinning, .ant-spin'
+
+READINESS_JS = """({ rowSelector, spinnerSelector, quietMs, timeoutMs, minRows }) => new Promise((resolve) => {
+    const start = performance.now();
+    let lastChange = start;
+    let lastCount = -1;
+    let timer = null;
+    let done = false;
+
+    const spinnerVisible = () => Array.from(document.querySelectorAll(spinnerSelector))
+        .some(el => el.getClientRects().length > 0);
+
+    const observer = new MutationObserver(() => { lastChange = performance.now(); });
+    observer.observe(document.documentElement, { childList: true, subtree: true, characterData: true });
+
+    const finish = (result) => {
+        done = true;
+        observer.disconnect();
+        clearInterval(timer);
+        resolve({ ...result, elapsedMs: Math.round(performance.now() - start) });
+    };
+
+    const check = () => {
+        const now = performance.now();
+        const count = document.querySelectorAll(rowSelector).length;
+        if (count !== lastCount) {
+            lastCount = count;
+            lastChange = now;
+        }
+
+        if (/login|signin/.test(location.href)) {
+            return finish({ rows: count, timedOut: false, redirected: true });
+        }
+        if (count >= minRows && now - lastChange >= quietMs && !spinnerVisible()) {
+            return finish({ rows: count, timedOut: false, redirected: false });
+        }
+        if (now - start >= timeoutMs) {
+            return finish({ rows: count, timedOut: true, redirected: false });
+        }
+    };
+
+    check();
+    if (!done) timer = setInterval(check, 50);
+})"""
+
+
+def readiness_helper_js(name='waitUntilReady'):
+    """
+    Return a JS statement defining `name(page, opts)` for an Apify pageFunction.
+
+    The helper runs READINESS_JS through page.evaluate with this module's
+    defaults, which `opts` can override.
+    """
+    defaults = json.dumps({
+        'rowSelector': DEFAULT_ROW_SELECTOR,
+        'spinnerSelector': SPINNER_SELECTOR,
+        'quietMs': QUIET_MS,
+        'timeoutMs': READY_TIMEOUT,
+        'minRows': 1,
+    })
+    return (
+        f"const {name} = (page, opts = {{}}) => page.evaluate({READINESS_JS}, {{ ...{defaults}, ...opts }})"
+        ".catch(e => ({ rows: 0, elapsedMs: 0, timedOut: true, redirected: false, error: e.message }));"
+    )
+
+
+async def wait_until_ready(page, row_selector=DEFAULT_ROW_SELECTOR, quiet_ms=QUIET_MS,
+                           timeout=READY_TIMEOUT, min_rows=1):
+    """
+    Wait until the results have stopped changing and the spinner is gone.
+
+    Returns {'rows', 'elapsedMs', 'timedOut', 'redirected'}. If the page
+    navigates away mid-wait (e.g. a hard redirect to /login) the evaluate call
+    fails and a timed-out result with the error message is returned instead.
+    """
+    try:
+        return await page.evaluate(READINESS_JS, {
+            'rowSelector': row_selector,
+            'spinnerSelector': SPINNER_SELECTOR,
+            'quietMs': quiet_ms,
+            'timeoutMs': timeout,
+            'minRows': min_rows,
+        })
+    except Exception as e:
+        return {'rows': 0, 'elapsedMs': 0, 'timedOut': True, 'redirected': False, 'error': str(e)}
@@ -0,0 +1,22 @@
+"""
+Results page URLs and page sharding
+
+Shared by the multi-page scraper and the Apify fan-out: both turn a search
+URL plus a page range into one URL per results page and split the pages into
+shards for parallel workers (processes or actor runs).
+"""
+
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode, quote
+
+
+def build_page_url(base_url, page_number, page_size):
+    """Return base_url with its page/size query parameters set"""
+    parts = urlsplit(base_url)
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k not in ('page', 'size')]
+    query += [('page', str(page_number)), ('size', str(page_size))]
+    return urlunsplit(parts._replace(query=urlencode(query, safe='[]', quote_via=quote)))
+
+
+def shard_pages(pages, shards):
+    """Deal pages out round-robin so every shard gets a similar mix"""
+    return [shard for shard in (pages[i::shards] for i in range(shards)) if shard]
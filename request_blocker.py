@@ -0,0 +1,119 @@
+"""
+Request blocking layer for the local Playwright scrapers
+
+The Apify run_input already excludes images and fonts, but the local scrapers
+load everything - including Hotjar, Intercom, Mixpanel and Google Analytics,
+which keep the page from ever reaching 'networkidle'. This module installs a
+context.route() handler that aborts requests by resource type and host, and
+keeps counters of what it saved.
+
+Rules are checked in this order:
+    1. host in ALLOW_HOSTS            -> allowed
+    2. type in ALLOW_RESOURCE_TYPES   -> allowed
+    3. host in BLOCK_HOSTS            -> blocked
+    4. type in BLOCK_RESOURCE_TYPES   -> blocked
+    5. anything else                  -> allowed
+
+Host entries match as substrings of the request hostname, so 'hotjar'
+covers static.hotjar.com, script.hotjar.com, etc.
+
+Usage:
+    blocker = RequestBlocker()
+    await blocker.install(context)
+    ...
+    blocker.print_summary()
+"""
+
+import os
+from collections import Counter
+from urllib.parse import urlsplit
+
+
+def _env_list(name, default):
+    return [v.strip().lower() for v in os.getenv(name, default).split(',') if v.strip()]
+
+
+# Master switch
+BLOCK_REQUESTS = os.getenv('BLOCK_REQUESTS', 'true').lower() == 'true'
+
+# Resource types: document, stylesheet, image, media, font, script, xhr, fetch, websocket, other...
+BLOCK_RESOURCE_TYPES = _env_list('BLOCK_RESOURCE_TYPES', 'image,media,font')
+ALLOW_RESOURCE_TYPES = _env_list('ALLOW_RESOURCE_TYPES', 'document')
+
+BLOCK_HOSTS = _env_list(
+    'BLOCK_HOSTS',
+    'hotjar,intercom,mixpanel,google-analytics,googletagmanager,doubleclick,'
+    'facebook.net,segment.io,sentry.io,clarity.ms'
+)
+ALLOW_HOSTS = _env_list('ALLOW_HOSTS', '')
+
+# Rough transfer size per blocked request, used for the "bytes saved" estimate
+ESTIMATED_BYTES = {
+    'image': 40_000,
+    'media': 500_000,
+    'font': 30_000,
+    'stylesheet': 20_000,
+    'script': 60_000,
+    'xhr': 2_000,
+    'fetch': 2_000,
+}
+DEFAULT_ESTIMATED_BYTES = 5_000
+
+
+class RequestBlocker:
+    def __init__(self, block_types=None, allow_types=None, block_hosts=None, allow_hosts=None):
+        self.block_types = set(BLOCK_RESOURCE_TYPES if block_types is None else block_types)
+        self.allow_types = set(ALLOW_RESOURCE_TYPES if allow_types is None else allow_types)
+        self.block_hosts = list(BLOCK_HOSTS if block_hosts is None else block_hosts)
+        self.allow_hosts = list(ALLOW_HOSTS if allow_hosts is None else allow_hosts)
+
+        self.requests_seen = 0
+        self.requests_blocked = 0
+        self.bytes_saved = 0
+        self.blocked_by_type = Counter()
+        self.blocked_by_host = Counter()
+
+    async def install(self, target):
+        """Route every request of a BrowserContext (or Page) through the blocker"""
+        await target.route('**/*', self.handle)
+
+    def block_reason(self, resource_type, url):
+        """Return why a request should be blocked, or None to let it through"""
+        host = (urlsplit(url).hostname or '').lower()
+
+        if any(h in host for h in self.allow_hosts):
+            return None
+        if resource_type in self.allow_types:
+            return None
+        if any(h in host for h in self.block_hosts):
+            return 'host'
+        if resource_type in self.block_types:
+            return 'type'
+        return None
+
+    async def handle(self, route):
+        request = route.request
+        self.requests_seen += 1
+
+        if self.block_reason(request.resource_type, request.url) is None:
+            # fallback() rather than continue_() so earlier routes (e.g. HAR replay) still apply
+            await route.fallback()
+            return
+
+        self.requests_blocked += 1
+        self.bytes_saved += ESTIMATED_BYTES.get(request.resource_type, DEFAULT_ESTIMATED_BYTES)
+        self.blocked_by_type[request.resource_type] += 1
+        self.blocked_by_host[urlsplit(request.url).hostname or ''] += 1
+        await route.abort()
+
+    def print_summary(self):
+        """Print how many requests and bytes were saved"""
+        if not self.requests_seen:
+            return
+        share = 100 * self.requests_blocked / self.requests_seen
+        print(f"Blocked {self.requests_blocked}/{self.requests_seen} requests ({share:.0f}%), "
+              f"~{self.bytes_saved / 1_000_000:.1f} MB saved")
+        if self.blocked_by_type:
+            print(f"   By type: {dict(self.blocked_by_type.most_common())}")
+        if self.blocked_by_host:
+            print(f"   Top hosts: {dict(self.blocked_by_host.most_common(5))}")
@@ -0,0 +1,150 @@
+"""
+On-disk cache of search page payloads
+
+Daily re-runs and development loops fetch the same search pages over and
+over. ResponseCache keeps the raw payload of every page - the columnar DOM
+extraction result or the search API JSON - in CACHE_DIR, keyed by a hash of
+the normalized page URL (scheme/host lowercased, query parameters sorted,
+fragment dropped). A hit rebuilds the records without any browser or network
+traffic, so re-running with different exports costs nothing.
+
+    - entries older than CACHE_TTL seconds count as misses
+    - the directory is kept under CACHE_MAX_MB by evicting the least recently
+      used entries (file mtime is bumped on every hit)
+    - refresh=True ignores existing entries but still stores new ones
+
+Usage:
+    cache = ResponseCache()
+    entry = cache.get(url)          # {'kind': 'dom' | 'network', 'payload': ...} or None
+    cache.put(url, 'dom', payload)
+"""
+
+import hashlib
+import json
+import os
+import time
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+from columnar_rows import ColumnarRows
+from network_capture import payload_to_records
+
+CACHE_DIR = os.getenv('CACHE_DIR', '.cache/pages')
+CACHE_TTL = int(os.getenv('CACHE_TTL', str(24 * 3600)))
+CACHE_MAX_MB = float(os.getenv('CACHE_MAX_MB', '200'))
+CACHE = os.getenv('CACHE', 'false').lower() == 'true'
+
+
+def normalize_url(url):
+    """Canonical form of a page URL so equivalent searches share one entry"""
+    parts = urlsplit(url)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path.rstrip('/') or '/', query, ''))
+
+
+def cache_key(url):
+    return hashlib.sha256(normalize_url(url).encode('utf-8')).hexdigest()
+
+
+def records_from_entry(entry):
+    """Rebuild scraper records from a cached payload"""
+    if entry['kind'] == 'dom':
+        return ColumnarRows(entry['payload'])
+    return payload_to_records(entry['payload'])
+
+
+class ResponseCache:
+    def __init__(self, directory=CACHE_DIR, ttl=CACHE_TTL, max_mb=CACHE_MAX_MB, refresh=False):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.refresh = refresh
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+        # Running size estimate; the directory is only rescanned once it looks too big
+        self.size = None
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, url):
+        key = cache_key(url)
+        return os.path.join(self.directory, key[:2], f'{key}.json')
+
+    def get(self, url):
+        """Cached entry for a page URL, or None if missing, expired or refreshing"""
+        path = self.path(url)
+        if self.refresh or not os.path.exists(path):
+            self.misses += 1
+            return None
+
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+
+        if time.time() - entry.get('storedAt', 0) > self.ttl:
+            self.misses += 1
+            return None
+
+        # Mark as recently used for LRU eviction
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self.hits += 1
+        return entry
+
+    def put(self, url, kind, payload):
+        """Store a page payload ('dom' or 'network') under its URL"""
+        path = self.path(url)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        entry = {
+            'url': normalize_url(url),
+            'kind': kind,
+            'storedAt': time.time(),
+            'payload': payload,
+        }
+        # Temp file + rename: readers in other processes never see half an entry
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(entry, f, ensure_ascii=False, separators=(',', ':'))
+            written = f.tell()
+        os.replace(tmp_path, path)
+        if self.size is not None:
+            self.size += written
+        self.evict()
+
+    def evict(self):
+        """Delete least recently used entries until the cache fits in max_bytes"""
+        if self.size is not None and self.size <= self.max_bytes:
+            return
+
+        entries = []
+        total = 0
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if not name.endswith('.json'):
+                    continue
+                try:
+                    stat = os.stat(os.path.join(root, name))
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, os.path.join(root, name)))
+                total += stat.st_size
+
+        self.size = total
+        if total <= self.max_bytes:
+            return
+        for _, size, path in sorted(entries):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                continue
+            self.evicted += 1
+            self.size -= size
+            if self.size <= self.max_bytes:
+                break
+
+    def print_summary(self):
+        print(f"🗄️  Page cache: {self.hits} hits, {self.misses} misses, {self.evicted} evicted ({self.directory})")
@@ -0,0 +1,153 @@
+"""
+Streaming NDJSON result sink
+
+The scrapers used to keep every record in memory and write one pretty-printed
+JSON array at the very end, so a crash lost everything and memory grew with
+the number of pages. NdjsonSink appends one compact JSON line per record as
+soon as a page is done, flushes after every batch and fsyncs every
+FSYNC_EVERY records (and on close). The legacy JSON array and CSV exports are
+produced from the NDJSON file at the end by streaming over it, so memory stays
+flat no matter how many pages were scraped.
+
+Usage:
+    with NdjsonSink('muraena_results_20250101_120000.ndjson') as sink:
+        sink.write_many(records)
+    export_json(sink.path, 'muraena_results_20250101_120000.json')
+    export_csv(sink.path, 'muraena_results_20250101_120000.csv')
+"""
+
+import csv
+import json
+import os
+import time
+
+FSYNC_EVERY = int(os.getenv('FSYNC_EVERY', '500'))
+FSYNC_SECONDS = float(os.getenv('FSYNC_SECONDS', '5'))
+
+CSV_HEADER = [
+    'Row', 'Company Name', 'Website', 'Industry', 'Location',
+    'Headcount', 'Email', 'Phone', 'Role', 'Company Link', 'Website Link'
+]
+
+
+def _text(record, field):
+    value = record.get(field, '')
+    return value.get('text', '') if isinstance(value, dict) else value
+
+
+def _link(record, field):
+    value = record.get(field, '')
+    return value.get('link', '') if isinstance(value, dict) else ''
+
+
+def csv_row(record):
+    """Flatten a scraper record into a CSV_HEADER row"""
+    return [
+        record.get('rowNumber', ''),
+        _text(record, 'companyName'),
+        _text(record, 'website'),
+        _text(record, 'industry'),
+        _text(record, 'location'),
+        _text(record, 'headcount'),
+        _text(record, 'email'),
+        _text(record, 'phone'),
+        _text(record, 'role'),
+        _link(record, 'companyName'),
+        _link(record, 'website'),
+    ]
+
+
+def ndjson_line(record):
+    """One compact NDJSON line for a record"""
+    return json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n'
+
+
+class NdjsonSink:
+    def __init__(self, path, fsync_every=FSYNC_EVERY, fsync_seconds=FSYNC_SECONDS, append=True):
+        self.path = path
+        self.fsync_every = fsync_every
+        self.fsync_seconds = fsync_seconds
+        self.count = 0
+        self.unsynced = 0
+        self.last_sync = time.monotonic()
+        self.file = open(path, 'a' if append else 'w', encoding='utf-8')
+        self.offset = self.file.tell()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def write(self, record):
+        self.write_many([record])
+
+    def write_many(self, records):
+        """Append records as one compact JSON line each; returns the number written"""
+        return self.write_lines([ndjson_line(record) for record in records])
+
+    def write_lines(self, lines):
+        """Append already serialized NDJSON lines (e.g. built in a worker process)"""
+        if not lines:
+            return 0
+
+        data = ''.join(lines)
+        self.file.write(data)
+        self.file.flush()
+        self.offset += len(data.encode('utf-8'))
+        self.count += len(lines)
+        self.unsynced += len(lines)
+
+        if self.unsynced >= self.fsync_every or time.monotonic() - self.last_sync >= self.fsync_seconds:
+            self.sync()
+        return len(lines)
+
+    def sync(self):
+        os.fsync(self.file.fileno())
+        self.unsynced = 0
+        self.last_sync = time.monotonic()
+
+    def close(self):
+        if self.file.closed:
+            return
+        self.sync()
+        self.file.close()
+
+
+def iter_records(path):
+    """Yield records from an NDJSON file, skipping a truncated last line"""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                # A crash mid-write leaves at most one partial line at the end
+                continue
+
+
+def export_json(ndjson_path, json_path):
+    """Convert NDJSON into the legacy pretty-printed JSON array, one record at a time"""
+    count = 0
+    with open(json_path, 'w', encoding='utf-8') as out:
+        out.write('[')
+        for record in iter_records(ndjson_path):
+            out.write(',\n  ' if count else '\n  ')
+            out.write(json.dumps(record, indent=2, ensure_ascii=False).replace('\n', '\n  '))
+            count += 1
+        out.write('\n]' if count else ']')
+    return count
+
+
+def export_csv(ndjson_path, csv_path, header=CSV_HEADER, row=csv_row):
+    """Convert NDJSON into CSV, one record at a time"""
+    count = 0
+    with open(csv_path, 'w', newline='', encoding='utf-8') as out:
+        writer = csv.writer(out)
+        writer.writerow(header)
+        for record in iter_records(ndjson_path):
+            writer.writerow(row(record))
+            count += 1
+    return count
@@ -0,0 +1,213 @@
+"""
+Apify run telemetry
+
+Every Apify-backed run is recorded in a local SQLite table (APIFY_STATS_DB)
+when it finishes: duration, compute units, memory, cost, crawler request
+counts and records per second. Runs are keyed by a hash of their
+configuration - an allowlist of run_input settings (CONFIG_KEYS) plus hashes
+of the pageFunction and navigation hooks with every string literal blanked
+out - so all runs (and all fan-out shards) with the same configuration share
+one input hash, and a change such as maxConcurrency, waitUntil or the proxy
+group shows up as a new hash to compare against. The code itself is never
+stored: it embeds the login credentials and session cookies.
+
+Usage:
+    record_run(client, run, run_input, items=7, records=700)
+    python muraena.py report                  # one line per configuration
+    python muraena.py report --hash 3f2a9c    # every run of one configuration
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import time
+
+STATS_DB = os.getenv('APIFY_STATS_DB', 'apify_runs.sqlite')
+# Record of the crawler's own statistics in the run's default key-value store
+CRAWLER_STATS_KEY = 'SDK_CRAWLER_STATISTICS_0'
+# run_input settings that are stored and hashed; anything else (credentials, cookies) never is.
+# maxRequestsPerCrawl and pageFunctionTimeoutSecs are left out: shard_input() sizes them per shard.
+CONFIG_KEYS = (
+    'maxConcurrency', 'maxRequestRetries', 'waitUntil', 'proxyConfiguration', 'pageLoadTimeoutSecs',
+    'memoryMbytes', 'launcher', 'useChrome', 'headless', 'downloadMedia', 'downloadCss',
+)
+CODE_KEYS = {'pageFunction': 'pageFunctionHash', 'preNavigationHooks': 'preNavigationHooksHash',
+             'postNavigationHooks': 'postNavigationHooksHash'}
+# JS string and template literals, where the scripts put emails, passwords and cookie values
+JS_STRING = re.compile(r"""'(?:[^'\\\n]|\\.)*'|"(?:[^"\\\n]|\\.)*"|`(?:[^`\\]|\\.)*`""")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    input_hash TEXT NOT NULL,
+    group_id TEXT,
+    actor TEXT,
+    status TEXT,
+    started_at TEXT,
+    finished_at TEXT,
+    duration_secs REAL,
+    compute_units REAL,
+    usage_usd REAL,
+    memory_mb INTEGER,
+    mem_avg_mb REAL,
+    mem_max_mb REAL,
+    requests_finished INTEGER,
+    requests_failed INTEGER,
+    requests_retries INTEGER,
+    start_urls INTEGER,
+    items INTEGER,
+    records INTEGER,
+    records_per_sec REAL,
+    config TEXT,
+    recorded_at REAL
+);
+CREATE INDEX IF NOT EXISTS runs_input_hash ON runs (input_hash, started_at);
+"""
+
+
+def code_hash(source):
+    """Hash of JS source with its string literals blanked out, so no secret goes into it"""
+    return hashlib.sha256(JS_STRING.sub('""', source).encode('utf-8')).hexdigest()[:16]
+
+
+def input_config(run_input):
+    """The part of run_input that describes how a run scrapes, not what, without secrets"""
+    config = {k: run_input[k] for k in CONFIG_KEYS if k in run_input}
+    for key, hash_key in CODE_KEYS.items():
+        if run_input.get(key):
+            config[hash_key] = code_hash(run_input[key])
+    return config
+
+
+def input_hash(run_input):
+    data = json.dumps(input_config(run_input), sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(data.encode('utf-8')).hexdigest()[:16]
+
+
+def config_summary(run_input):
+    """Short description of the settings most likely to change speed or cost"""
+    proxy = run_input.get('proxyConfiguration') or {}
+    groups = ','.join(proxy.get('apifyProxyGroups') or []) or ('auto' if proxy.get('useApifyProxy') else 'none')
+    return (f"conc={run_input.get('maxConcurrency', '?')} "
+            f"wait={run_input.get('waitUntil', '?')} proxy={groups}")
+
+
+def connect(path=STATS_DB):
+    connection = sqlite3.connect(path)
+    connection.row_factory = sqlite3.Row
+    connection.executescript(SCHEMA)
+    return connection
+
+
+def _mb(value):
+    return round(value / (1024 * 1024), 1) if value else None
+
+
+def crawler_stats(client, run):
+    """The crawler's request statistics from the run's key-value store, or {}"""
+    try:
+        record = client.key_value_store(run['defaultKeyValueStoreId']).get_record(CRAWLER_STATS_KEY)
+    except Exception:
+        return {}
+    value = (record or {}).get('value')
+    return value if isinstance(value, dict) else {}
+
+
+def record_run(client, run, run_input, items, records, group_id=None, actor=None, path=STATS_DB):
+    """Store the stats of a finished run; never raises (telemetry must not fail a scrape)"""
+    try:
+        stats = run.get('stats') or {}
+        crawler = crawler_stats(client, run)
+        duration = stats.get('runTimeSecs') or (stats.get('durationMillis') or 0) / 1000 or None
+
+        with connect(path) as connection:
+            connection.execute(
+                'INSERT OR REPLACE INTO runs VALUES '
+                '(?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (
+                    run['id'],
+                    input_hash(run_input),
+                    group_id or run['id'],
+                    actor or run.get('actId'),
+                    run.get('status'),
+                    str(run.get('startedAt') or ''),
+                    str(run.get('finishedAt') or ''),
+                    duration,
+                    stats.get('computeUnits'),
+                    run.get('usageTotalUsd'),
+                    (run.get('options') or {}).get('memoryMbytes'),
+                    _mb(stats.get('memAvgBytes')),
+                    _mb(stats.get('memMaxBytes')),
+                    crawler.get('requestsFinished'),
+                    crawler.get('requestsFailed'),
+                    crawler.get('requestsRetries'),
+                    len(run_input.get('startUrls') or []),
+                    items,
+                    records,
+                    round(records / duration, 2) if duration else None,
+                    json.dumps(input_config(run_input), sort_keys=True, ensure_ascii=False),
+                    time.time(),
+                ),
+            )
+        connection.close()
+    except Exception as e:
+        print(f"⚠️ Could not record run stats: {str(e)}")
+
+
+def _fmt(value, spec):
+    """format() a number, or a right-aligned '-' of the same width for NULL"""
+    if value is not None:
+        return format(value, spec)
+    return '-'.rjust(int(spec.rstrip('df').split('.')[0]))
+
+
+def report(path=STATS_DB, hash_prefix=None, limit=20):
+    """Print run stats per configuration, or every run of one configuration"""
+    if not os.path.exists(path):
+        print(f"❌ No run stats yet ({path}) - they are recorded by the Apify scrapers")
+        return 1
+
+    connection = connect(path)
+    if hash_prefix:
+        rows = connection.execute(
+            'SELECT * FROM runs WHERE input_hash LIKE ? ORDER BY started_at DESC LIMIT ?',
+            (hash_prefix + '%', limit),
+        ).fetchall()
+        if not rows:
+            print(f"❌ No runs with input hash {hash_prefix}*")
+            return 1
+        print(f"📈 Runs of {rows[0]['input_hash']} ({config_summary(json.loads(rows[0]['config']))}), newest first\n")
+        print(f"   {'started':<20} {'status':<10} {'secs':>7} {'CU':>7} {'USD':>7} "
+              f"{'mem MB':>7} {'req ok':>7} {'failed':>7} {'records':>8} {'rec/s':>7}")
+        for row in rows:
+            print(f"   {row['started_at'][:19]:<20} {row['status'] or '-':<10} "
+                  f"{_fmt(row['duration_secs'], '7.0f')} {_fmt(row['compute_units'], '7.3f')} "
+                  f"{_fmt(row['usage_usd'], '7.3f')} {_fmt(row['mem_max_mb'], '7.0f')} "
+                  f"{_fmt(row['requests_finished'], '7d')} {_fmt(row['requests_failed'], '7d')} "
+                  f"{_fmt(row['records'], '8d')} {_fmt(row['records_per_sec'], '7.2f')}")
+        connection.close()
+        return 0
+
+    rows = connection.execute(
+        'SELECT input_hash, MAX(config) AS config, COUNT(*) AS runs, '
+        "COUNT(CASE WHEN status = 'SUCCEEDED' THEN 1 END) AS succeeded, MAX(started_at) AS last_run, "
+        'AVG(duration_secs) AS duration, AVG(compute_units) AS cu, AVG(usage_usd) AS usd, '
+        'SUM(records) AS records, SUM(records) / SUM(duration_secs) AS rate, '
+        'SUM(compute_units) / NULLIF(SUM(records), 0) * 1000 AS cu_per_1k '
+        'FROM runs GROUP BY input_hash ORDER BY last_run DESC LIMIT ?',
+        (limit,),
+    ).fetchall()
+    connection.close()
+
+    print("📈 Apify runs per configuration, most recently used first\n")
+    print(f"   {'input hash':<17} {'runs':>5} {'ok':>4} {'avg secs':>9} {'avg CU':>7} {'avg USD':>8} "
+          f"{'rec/s':>7} {'CU/1k rec':>10}  {'last run':<20} config")
+    for row in rows:
+        print(f"   {row['input_hash']:<17} {row['runs']:5d} {row['succeeded']:4d} "
+              f"{_fmt(row['duration'], '9.0f')} {_fmt(row['cu'], '7.3f')} {_fmt(row['usd'], '8.3f')} "
+              f"{_fmt(row['rate'], '7.2f')} {_fmt(row['cu_per_1k'], '10.3f')}  "
+              f"{row['last_run'][:19]:<20} {config_summary(json.loads(row['config']))}")
+    print("\n💡 Details of one configuration: python muraena.py report --hash <input hash>")
+    return 0
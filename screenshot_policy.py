@@ -0,0 +1,118 @@
+"""
+Screenshot policy for the scrapers
+
+Every run used to take several full-page PNG screenshots on the happy path,
+and a full-page PNG of a 100-row table costs more than the extraction itself.
+ScreenshotPolicy decides which screenshots are taken and how:
+
+    SCREENSHOTS        off | on-error | sampled | always   (default: on-error)
+    SCREENSHOT_EVERY   with 'sampled': screenshot every Nth page (default: 10)
+    SCREENSHOT_QUALITY JPEG quality 1-100, 0 = PNG          (default: 70)
+    SCREENSHOT_FULL_PAGE  'true' for full-page captures      (default: viewport only)
+
+Error screenshots are taken in every mode except 'off'. The capture itself
+has to happen before the page changes, but writing the bytes to disk is
+handed to a background thread; flush() waits for pending writes.
+
+screenshot_helper_js() gives the Apify pageFunction the same policy; there
+the images are stored in the run's key-value store (the actor's filesystem is
+thrown away with its container), where download_artifacts() picks them up.
+"""
+
+import asyncio
+import json
+import os
+
+SCREENSHOTS = os.getenv('SCREENSHOTS', 'on-error').lower()
+SCREENSHOT_EVERY = int(os.getenv('SCREENSHOT_EVERY', '10'))
+SCREENSHOT_QUALITY = int(os.getenv('SCREENSHOT_QUALITY', '70'))
+SCREENSHOT_FULL_PAGE = os.getenv('SCREENSHOT_FULL_PAGE', 'false').lower() == 'true'
+SCREENSHOT_DIR = 'screenshots'
+
+MODES = ('off', 'on-error', 'sampled', 'always')
+
+
+class ScreenshotPolicy:
+    def __init__(self, mode=SCREENSHOTS, every=SCREENSHOT_EVERY, quality=SCREENSHOT_QUALITY,
+                 full_page=SCREENSHOT_FULL_PAGE, directory=SCREENSHOT_DIR):
+        if mode not in MODES:
+            raise ValueError(f"SCREENSHOTS must be one of {', '.join(MODES)}, got '{mode}'")
+        self.mode = mode
+        self.every = max(1, every)
+        self.quality = quality
+        self.full_page = full_page
+        self.directory = directory
+        self.pages = 0
+        self.taken = 0
+        self.pending = set()
+
+    def next_page(self):
+        """Count a new page; returns True if its happy-path screenshots should be taken"""
+        self.pages += 1
+        if self.mode == 'always':
+            return True
+        return self.mode == 'sampled' and (self.pages - 1) % self.every == 0
+
+    def wanted(self, sampled, error):
+        if self.mode == 'off':
+            return False
+        return error or sampled
+
+    def path(self, name):
+        extension = 'jpg' if self.quality else 'png'
+        return os.path.join(self.directory, f'{name}.{extension}')
+
+    async def capture(self, page, name, sampled=True, error=False):
+        """
+        Screenshot `page` as `name` if the policy allows it; returns the file
+        path (written in the background) or None.
+        """
+        if not self.wanted(sampled, error):
+            return None
+
+        options = {'full_page': self.full_page or error}
+        if self.quality:
+            options.update(type='jpeg', quality=self.quality)
+        data = await page.screenshot(**options)
+
+        path = self.path(name)
+        task = asyncio.create_task(asyncio.to_thread(self.write, path, data))
+        self.pending.add(task)
+        task.add_done_callback(self.pending.discard)
+        self.taken += 1
+        return path
+
+    def write(self, path, data):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(data)
+
+    async def flush(self):
+        """Wait until all screenshots are on disk"""
+        if self.pending:
+            await asyncio.gather(*self.pending, return_exceptions=True)
+
+
+def screenshot_helper_js(name='snap', mode=SCREENSHOTS, quality=SCREENSHOT_QUALITY, full_page=SCREENSHOT_FULL_PAGE):
+    """
+    Return a JS statement defining `name(page, file, isError)` for an Apify
+    pageFunction, applying the same policy (each pageFunction call is one page,
+    so 'sampled' behaves like 'on-error' there). The image is saved to the
+    run's default key-value store as `file`.jpg / `file`.png; the statement
+    must go where the pageFunction's `context` is in scope.
+    """
+    config = json.dumps({'mode': mode, 'quality': quality, 'fullPage': full_page})
+    return f"""const {name} = async (page, file, isError = false) => {{
+        const cfg = {config};
+        if (cfg.mode === 'off' || (!isError && cfg.mode !== 'always')) return;
+        const sdk = context.Actor || context.Apify;
+        if (!sdk) {{
+            context.log.warning(`No key-value store access, screenshot ${{file}} skipped`);
+            return;
+        }}
+        const options = {{ fullPage: cfg.fullPage || isError }};
+        if (cfg.quality) Object.assign(options, {{ type: 'jpeg', quality: cfg.quality }});
+        const image = await page.screenshot(options);
+        await sdk.setValue(file + (cfg.quality ? '.jpg' : '.png'), image,
+            {{ contentType: cfg.quality ? 'image/jpeg' : 'image/png' }});
+    }};"""
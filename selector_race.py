@@ -0,0 +1,93 @@
+"""
+Selector resolution by racing all candidates at once
+
+wait_for_table / wait_for_companies used to try their candidate selectors one
+after another with a timeout each, so a miss could burn 27-40 s before the
+fallback even started. race_selectors() waits on every candidate at the same
+time and returns the first one that matches together with its row count.
+
+Every win is recorded in SELECTOR_STATS_FILE (per selector group) so the
+candidate lists can be reordered by how often each selector actually wins:
+
+    python selector_race.py
+"""
+
+import asyncio
+import json
+import os
+
+SELECTOR_STATS_FILE = os.getenv('SELECTOR_STATS_FILE', 'selector_stats.json')
+
+
+class SelectorStats:
+    def __init__(self, path=SELECTOR_STATS_FILE):
+        self.path = path
+        self.wins = {}
+        if path and os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self.wins = json.load(f)
+            except (OSError, ValueError):
+                self.wins = {}
+
+    def record(self, group, selector):
+        """Count a win for selector within group and persist the table"""
+        counts = self.wins.setdefault(group, {})
+        counts[selector] = counts.get(selector, 0) + 1
+        if self.path:
+            # Atomic, with a per-process temp file: the multipage shards share this file
+            tmp_path = f'{self.path}.{os.getpid()}.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.wins, f, indent=2)
+            os.replace(tmp_path, self.path)
+
+    def ranked(self, group):
+        """Selectors of a group, most frequent winner first"""
+        return sorted(self.wins.get(group, {}).items(), key=lambda item: -item[1])
+
+
+selector_stats = SelectorStats()
+
+
+async def race_selectors(page, selectors, timeout=10000, group=None, state='visible'):
+    """
+    Wait for all selectors concurrently and return (selector, count) for the
+    first one that appears, or (None, 0) if none shows up within timeout.
+
+    When several candidates are already present, the earliest one in the list
+    wins, so the list order still expresses preference.
+    """
+    tasks = {
+        asyncio.ensure_future(page.wait_for_selector(selector, timeout=timeout, state=state)): selector
+        for selector in selectors
+    }
+    winner = None
+    pending = set(tasks)
+
+    try:
+        while pending and winner is None:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            matched = [tasks[t] for t in done if not t.cancelled() and t.exception() is None]
+            if matched:
+                winner = min(matched, key=selectors.index)
+    finally:
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    if winner is None:
+        return None, 0
+
+    count = await page.locator(winner).count()
+    if group:
+        selector_stats.record(group, winner)
+    return winner, count
+
+
+if __name__ == "__main__":
+    if not selector_stats.wins:
+        print(f"No selector stats recorded yet ({SELECTOR_STATS_FILE})")
+    for group in selector_stats.wins:
+        print(f"{group}:")
+        for selector, wins in selector_stats.ranked(group):
+            print(f"   {wins:5d}  {selector}")
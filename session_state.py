@@ -0,0 +1,132 @@
+"""
+Session bootstrap via Playwright storage_state
+
+The local scrapers used to add cookies, load https://app.muraena.ai just to
+call localStorage.setItem() once per key, and only then navigate to the real
+page. A storage_state (cookies + localStorage per origin) is applied by
+new_context(storage_state=...) before any page exists, so that extra page load
+disappears.
+
+extract_cookies.py writes STORAGE_STATE_FILE after a manual login. When that
+file is missing, an equivalent state is built in memory from the COOKIES and
+LOCAL_STORAGE constants of the scraper.
+
+probe_session() is a cheap check run before the real navigation: it looks for
+expired auth cookies and sends one plain HTTP request (no rendering) with the
+session, treating a redirect to /login or a 401/403 as a stale session.
+
+Only auth cookies count: analytics/chat cookies such as Hotjar's 30-minute
+_hjSession_* expire long before the login does. AUTH_COOKIES lists the auth
+cookie names explicitly; without it every cookie except the known tracker
+prefixes (TRACKER_COOKIE_PREFIXES) is checked.
+
+The app itself is a SPA whose auth token lives in localStorage, so its HTML
+answers 200 whether or not you are logged in - probing it only catches
+server-side redirects and 401/403. Set SESSION_PROBE_URL to an authenticated
+JSON API endpoint (and SESSION_TOKEN_KEY to the localStorage key holding the
+bearer token, if the API needs one) for a probe that really checks the login;
+otherwise the /login check after navigation is the authoritative one.
+"""
+
+import json
+import os
+import time
+
+STORAGE_STATE_FILE = os.getenv('STORAGE_STATE_FILE', 'storage_state.json')
+APP_ORIGIN = 'https://app.muraena.ai'
+
+AUTH_COOKIES = [c.strip() for c in os.getenv('AUTH_COOKIES', '').split(',') if c.strip()]
+TRACKER_COOKIE_PREFIXES = tuple(
+    p.strip() for p in os.getenv(
+        'TRACKER_COOKIE_PREFIXES',
+        '_ga,_gid,_gcl,_hj,intercom-,mp_,ajs_,_fbp,_clck,_clsk,__hs,hubspot,_uetsid,_uetvid',
+    ).split(',') if p.strip()
+)
+SESSION_PROBE_URL = os.getenv('SESSION_PROBE_URL', '')
+SESSION_TOKEN_KEY = os.getenv('SESSION_TOKEN_KEY', '')
+
+
+def load_storage_state(cookies=None, local_storage=None, path=STORAGE_STATE_FILE):
+    """Return the saved storage_state dict, or one built from cookies/local_storage"""
+    if path and os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    return {
+        'cookies': [
+            {
+                'expires': -1,
+                'sameSite': 'Lax',
+                **cookie,
+            }
+            for cookie in (cookies or [])
+        ],
+        'origins': [
+            {
+                'origin': APP_ORIGIN,
+                'localStorage': [{'name': k, 'value': v} for k, v in (local_storage or {}).items()],
+            }
+        ] if local_storage else [],
+    }
+
+
+def is_auth_cookie(name):
+    if AUTH_COOKIES:
+        return name in AUTH_COOKIES
+    return not name.startswith(TRACKER_COOKIE_PREFIXES)
+
+
+def expired_cookies(state, now=None):
+    """Names of auth cookies in a storage_state whose expiry is in the past"""
+    now = now or time.time()
+    return [
+        c['name'] for c in state.get('cookies', [])
+        if is_auth_cookie(c['name'])
+        and c.get('expires', -1) not in (-1, None) and 0 < c['expires'] < now
+    ]
+
+
+def local_storage_value(state, key, origin=APP_ORIGIN):
+    for entry in state.get('origins', []):
+        if entry.get('origin') == origin:
+            for item in entry.get('localStorage', []):
+                if item.get('name') == key:
+                    return item.get('value')
+    return None
+
+
+async def probe_session(playwright, url, state, timeout=10000):
+    """
+    Check a session without opening a page.
+
+    Returns (True, reason) if the session looks usable, (False, reason) if it
+    is clearly stale. Network errors are reported as usable so a flaky probe
+    never blocks a run - the real navigation still checks for /login.
+    """
+    expired = expired_cookies(state)
+    if expired:
+        return False, f"expired cookies: {', '.join(expired)}"
+
+    headers = {}
+    token = local_storage_value(state, SESSION_TOKEN_KEY) if SESSION_TOKEN_KEY else None
+    if token:
+        headers['Authorization'] = f'Bearer {token}'
+
+    request = await playwright.request.new_context(storage_state=state, extra_http_headers=headers)
+    try:
+        response = await request.get(SESSION_PROBE_URL or url, max_redirects=0, timeout=timeout)
+        location = response.headers.get('location', '')
+        if response.status in (401, 403):
+            return False, f"HTTP {response.status}"
+        if 300 <= response.status < 400 and ('login' in location or 'signin' in location):
+            return False, f"redirected to {location}"
+        if not SESSION_PROBE_URL:
+            # The SPA shell loads for anyone; only redirects and 401/403 mean something here
+            return True, f"HTTP {response.status}, login checked after navigation"
+        if not response.ok or 'json' not in response.headers.get('content-type', ''):
+            return False, f"API probe returned HTTP {response.status} {response.headers.get('content-type', '')}"
+        return True, f"API probe HTTP {response.status}"
+    except Exception as e:
+        return True, f"probe skipped ({e})"
+    finally:
+        await request.dispose()